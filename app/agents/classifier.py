@@ -0,0 +1,162 @@
+from sqlalchemy import select
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from collections import Counter, defaultdict
+import asyncio
+import hashlib
+import math
+import re
+import time
+
+from app.core.config import settings
+from app.core.database import async_session_scope
+from app.core.redis_client import RedisClient, redis_client
+from app.models.agent import AgentType
+from app.models.task import Task, TaskStatus
+
+CLASSIFIER_SOURCE = "classifier"
+
+STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "into", "about", "are", "was", "were",
+    "you", "your", "our", "can", "will", "would", "should", "could", "please", "need", "want",
+    "help", "make", "using", "use", "have", "has", "all", "any", "some", "how", "what", "which"
+}
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in re.findall(r"[a-z0-9][a-z0-9+#.-]*", text.lower()) if len(t) > 2 and t not in STOPWORDS]
+
+class ClassificationCache:
+    """Redis cache of agent configs keyed by the normalized task description."""
+    
+    def __init__(self, client: RedisClient):
+        self.client = client
+    
+    @staticmethod
+    def key_for(task_description: str) -> str:
+        normalized = " ".join(task_description.lower().split())
+        return f"classification:{hashlib.sha256(normalized.encode()).hexdigest()}"
+    
+    async def get(self, task_description: str) -> Optional[Dict[str, Any]]:
+        try:
+            cached = await self.client.get(self.key_for(task_description))
+        except Exception:
+            return None
+        return cached if isinstance(cached, dict) else None
+    
+    async def set(self, task_description: str, config: Dict[str, Any]):
+        try:
+            await self.client.set(self.key_for(task_description), config, expire=settings.CLASSIFICATION_CACHE_TTL)
+        except Exception:
+            pass
+
+class TaskClassifier:
+    """Nearest-centroid TF-IDF classifier over past task descriptions.
+    
+    Trained on completed tasks whose config came from the LLM, so it never
+    learns from its own guesses. It only answers when the best class has
+    enough samples and beats the runner-up by CLASSIFIER_MIN_MARGIN.
+    """
+    
+    def __init__(self):
+        self.idf: Dict[str, float] = {}
+        self.centroids: Dict[AgentType, Dict[str, float]] = {}
+        self.class_counts: Dict[AgentType, int] = {}
+        self.trained_at = 0.0
+        self._training: Optional[asyncio.Task] = None
+    
+    @staticmethod
+    def _normalize(vector: Dict[str, float]) -> Dict[str, float]:
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        return {t: v / norm for t, v in vector.items()} if norm else {}
+    
+    def _vectorize(self, tokens: Iterable[str]) -> Dict[str, float]:
+        counts = Counter(t for t in tokens if t in self.idf)
+        return self._normalize({t: c * self.idf[t] for t, c in counts.items()})
+    
+    def fit(self, samples: List[Tuple[str, AgentType]]):
+        documents = [(tokenize(text), agent_type) for text, agent_type in samples]
+        df = Counter()
+        for tokens, _ in documents:
+            df.update(set(tokens))
+        n = len(documents)
+        self.idf = {t: math.log((n + 1) / (d + 1)) + 1 for t, d in df.items()}
+        
+        sums: Dict[AgentType, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        counts: Counter = Counter()
+        for tokens, agent_type in documents:
+            counts[agent_type] += 1
+            for t, v in self._vectorize(tokens).items():
+                sums[agent_type][t] += v
+        
+        self.centroids = {agent_type: self._normalize(vector) for agent_type, vector in sums.items()}
+        self.class_counts = dict(counts)
+        self.trained_at = time.monotonic()
+    
+    def predict(self, text: str) -> Optional[Tuple[AgentType, float]]:
+        vector = self._vectorize(tokenize(text))
+        if not vector or not self.centroids:
+            return None
+        
+        scores = sorted(
+            ((sum(v * centroid.get(t, 0.0) for t, v in vector.items()), agent_type) for agent_type, centroid in self.centroids.items()),
+            key=lambda item: item[0],
+            reverse=True
+        )
+        best_score, best_type = scores[0]
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+        
+        if self.class_counts.get(best_type, 0) < settings.CLASSIFIER_MIN_CLASS_SAMPLES:
+            return None
+        if best_score < settings.CLASSIFIER_MIN_SCORE or best_score - runner_up < settings.CLASSIFIER_MIN_MARGIN:
+            return None
+        return best_type, best_score
+    
+    async def train_from_db(self):
+        async with async_session_scope() as db:
+            rows = (await db.execute(
+                # Only the config, not the full result with the task's output
+                select(Task.description, Task.result["config"])
+                .where(Task.status == TaskStatus.COMPLETED)
+                .order_by(Task.created_at.desc())
+                .limit(settings.CLASSIFIER_TRAINING_ROWS)
+            )).all()
+        
+        samples = []
+        for description, config in rows:
+            config = config or {}
+            if config.get("source") == CLASSIFIER_SOURCE:
+                continue
+            try:
+                samples.append((description, AgentType[str(config.get("agent_type", "")).upper()]))
+            except KeyError:
+                continue
+        self.fit(samples)
+    
+    def _retrain_if_stale(self):
+        stale = time.monotonic() - self.trained_at > settings.CLASSIFIER_RETRAIN_INTERVAL or not self.trained_at
+        if stale and (self._training is None or self._training.done()):
+            self._training = asyncio.create_task(self._train_quietly())
+    
+    async def _train_quietly(self):
+        try:
+            await self.train_from_db()
+        except Exception as e:
+            print(f"Error training task classifier: {e}")
+            self.trained_at = time.monotonic()
+    
+    def classify(self, task_description: str) -> Optional[Dict[str, Any]]:
+        self._retrain_if_stale()
+        prediction = self.predict(task_description)
+        if not prediction:
+            return None
+        agent_type, score = prediction
+        return {
+            "agent_type": agent_type.name,
+            "reasoning": f"Matched past {agent_type.value} tasks (similarity {score:.2f})",
+            "suggested_name": f"{agent_type.value.title()} Agent",
+            "description": task_description,
+            "custom_prompt_additions": "",
+            "source": CLASSIFIER_SOURCE
+        }
+
+classification_cache = ClassificationCache(redis_client)
+task_classifier = TaskClassifier()
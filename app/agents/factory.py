@@ -1,14 +1,92 @@
-from typing import Dict, Any, Optional
-from groq import Groq
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple
+import json
+import asyncio
+import time
+import httpx
+from groq import AsyncGroq, BadRequestError
 from app.core.config import settings
 from app.models.agent import Agent, AgentType
-from app.agents.templates import get_template
+from app.agents.templates import get_template, AGENT_TEMPLATES
+from app.agents.classifier import classification_cache, task_classifier
+from app.agents.scheduler import llm_scheduler, latency_tracker
+from app.core.metrics import LLM_REQUEST_DURATION, LLM_TIME_TO_FIRST_TOKEN, record_llm_usage
+
+ARCHITECT_SYSTEM_PROMPT = "You are an AI agent architect. Analyze tasks and recommend optimal agent configurations. Always respond with valid JSON."
+
+FUSED_INSTRUCTIONS = """
+
+Then, acting as an expert agent of the type you chose, complete the task itself. Put your full answer in an additional "output" field of the same JSON object."""
+
+SUMMARY_SYSTEM_PROMPT = "You maintain a running summary of a conversation between a user and an assistant. Keep every fact, decision, open question and user preference needed to continue it; drop pleasantries. Reply with the summary only."
+
+# Room for the largest template's answer plus the config fields
+FUSED_MAX_TOKENS = max(template["max_tokens"] for template in AGENT_TEMPLATES.values()) + 1000
+
+class CompletionUsage:
+    """Token counts and cost accumulated over one or more completions."""
+    
+    def __init__(self, model: Optional[str] = None):
+        self.model = model
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.ttft_ms: Optional[int] = None
+    
+    def add(self, model: str, usage: Optional[Any]):
+        if usage is None:
+            return
+        prompt_tokens = usage.prompt_tokens or 0
+        completion_tokens = usage.completion_tokens or 0
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        pricing = settings.LLM_PRICING.get(model, {})
+        self.cost += (prompt_tokens * pricing.get("input", 0) + completion_tokens * pricing.get("output", 0)) / 1_000_000
+    
+    def merge(self, other: "CompletionUsage"):
+        self.model = other.model or self.model
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cost += other.cost
+        if self.ttft_ms is None:
+            self.ttft_ms = other.ttft_ms
+
+def is_json_validation_error(error: BadRequestError) -> bool:
+    """True for Groq's 400 when a json_object response doesn't parse."""
+    body = error.body if isinstance(error.body, dict) else {}
+    detail = body.get("error", body)
+    return isinstance(detail, dict) and detail.get("code") == "json_validate_failed"
 
 class AgentFactory:
     def __init__(self):
-        self.groq_client = Groq(api_key=settings.GROQ_API_KEY)
+        self._async_groq_client: Optional[AsyncGroq] = None
+    
+    @property
+    def async_groq_client(self) -> AsyncGroq:
+        # Created lazily so the pooled connections bind to the running event loop
+        if self._async_groq_client is None:
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.GROQ_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.GROQ_MAX_KEEPALIVE_CONNECTIONS
+                ),
+                timeout=settings.GROQ_TIMEOUT
+            )
+            # Retries are handled by llm_scheduler so they respect the rate limits
+            self._async_groq_client = AsyncGroq(
+                api_key=settings.GROQ_API_KEY,
+                base_url=settings.GROQ_BASE_URL,
+                http_client=http_client,
+                max_retries=0
+            )
+        return self._async_groq_client
     
-    def create_agent_config(self, task_description: str) -> Dict[str, Any]:
+    async def aclose(self):
+        if self._async_groq_client is not None:
+            await self._async_groq_client.close()
+            self._async_groq_client = None
+    
+    @staticmethod
+    def _build_analysis_messages(task_description: str) -> List[Dict[str, str]]:
         analysis_prompt = f"""Analyze this task and determine the best agent type to handle it:
 
 Task: {task_description}
@@ -31,20 +109,14 @@ Respond with a JSON object:
     "description": "what this agent will do",
     "custom_prompt_additions": "any additional context for the system prompt"
 }}"""
-
-        response = self.groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are an AI agent architect. Analyze tasks and recommend optimal agent configurations. Always respond with valid JSON."},
-                {"role": "user", "content": analysis_prompt}
-            ],
-            temperature=0.3,
-            max_tokens=1000
-        )
-        
-        result_text = response.choices[0].message.content.strip()
-        
-        import json
+        return [
+            {"role": "system", "content": ARCHITECT_SYSTEM_PROMPT},
+            {"role": "user", "content": analysis_prompt}
+        ]
+    
+    @staticmethod
+    def _parse_agent_config(result_text: str, task_description: str) -> Dict[str, Any]:
+        result_text = result_text.strip()
         try:
             result = json.loads(result_text)
         except json.JSONDecodeError:
@@ -63,6 +135,144 @@ Respond with a JSON object:
         
         return result
     
+    @staticmethod
+    def _build_execution_messages(agent: Agent, input_data: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": agent.system_prompt},
+            {"role": "user", "content": input_data}
+        ]
+    
+    @staticmethod
+    def _build_conversation_messages(agent: Agent, summary: Optional[str], history: List[Dict[str, str]], input_data: str) -> List[Dict[str, str]]:
+        # Most stable content first (system prompt, summary, then turns in
+        # order) so consecutive turns share a prefix the provider can cache
+        messages = [{"role": "system", "content": agent.system_prompt}]
+        if summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+        messages.extend(history)
+        messages.append({"role": "user", "content": input_data})
+        return messages
+    
+    @staticmethod
+    def _estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+        return llm_scheduler.estimate_tokens(sum(len(m["content"]) for m in messages), max_tokens)
+    
+    async def _acomplete(self, model: str, messages: List[Dict[str, str]], user_id: Optional[str], usage: Optional[CompletionUsage] = None, **params):
+        """Non-streaming completion through the scheduler, with latency and usage metrics."""
+        start_time = time.monotonic()
+        outcome = "error"
+        try:
+            response = await llm_scheduler.run(
+                model,
+                self._estimate_tokens(messages, params["max_tokens"]),
+                user_id,
+                lambda: self.async_groq_client.chat.completions.create(model=model, messages=messages, **params)
+            )
+            outcome = "ok"
+        finally:
+            LLM_REQUEST_DURATION.labels(model, outcome).observe(time.monotonic() - start_time)
+        record_llm_usage(model, response.usage)
+        if usage is not None:
+            usage.add(model, response.usage)
+        return response
+    
+    async def acreate_agent_config(self, task_description: str, user_id: Optional[str] = None, usage: Optional[CompletionUsage] = None) -> Dict[str, Any]:
+        messages = self._build_analysis_messages(task_description)
+        response = await self._acomplete(
+            "llama-3.3-70b-versatile",
+            messages,
+            user_id,
+            usage,
+            temperature=0.3,
+            max_tokens=1000
+        )
+        
+        return self._parse_agent_config(response.choices[0].message.content, task_description)
+    
+    async def acreate_config_and_execute(self, task_description: str, user_id: Optional[str] = None, usage: Optional[CompletionUsage] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Classify the task and answer it in a single structured completion.
+        
+        The output is None when the model left it out or empty; the caller
+        then runs the agent as usual. Raises json.JSONDecodeError when the
+        reply isn't valid JSON.
+        """
+        messages = self._build_analysis_messages(task_description)
+        messages[1]["content"] += FUSED_INSTRUCTIONS
+        response = await self._acomplete(
+            "llama-3.3-70b-versatile",
+            messages,
+            user_id,
+            usage,
+            temperature=0.3,
+            max_tokens=FUSED_MAX_TOKENS,
+            response_format={"type": "json_object"}
+        )
+        
+        # JSON mode returns an object or nothing usable; a reply cut off at
+        # FUSED_MAX_TOKENS raises here instead of becoming a default config
+        config = json.loads(response.choices[0].message.content)
+        output = config.pop("output", None)
+        return config, output if isinstance(output, str) and output.strip() else None
+    
+    async def asummarize_conversation(self, summary: Optional[str], messages: List[Dict[str, str]], user_id: Optional[str] = None) -> str:
+        """Fold messages into the conversation's running summary."""
+        transcript = "\n\n".join(f"{message['role']}: {message['content']}" for message in messages)
+        prompt = f"Current summary:\n{summary}\n\n" if summary else ""
+        prompt += f"New messages:\n{transcript}\n\nWrite the updated summary."
+        response = await self._acomplete(
+            settings.CONVERSATION_SUMMARY_MODEL,
+            [
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            user_id,
+            temperature=0.2,
+            max_tokens=settings.CONVERSATION_SUMMARY_MAX_TOKENS
+        )
+        return response.choices[0].message.content.strip()
+    
+    async def alookup_agent_config(self, task_description: str) -> Optional[Dict[str, Any]]:
+        """Agent config from the cache or local classifier, without calling the LLM."""
+        cached = await classification_cache.get(task_description)
+        if cached:
+            return cached
+        
+        if settings.CLASSIFIER_ENABLED:
+            return task_classifier.classify(task_description)
+        return None
+    
+    async def aresolve_agent_config(self, task_description: str, user_id: Optional[str] = None, usage: Optional[CompletionUsage] = None) -> Dict[str, Any]:
+        """Pick an agent config from the cache or local classifier, else ask the LLM."""
+        config = await self.alookup_agent_config(task_description)
+        if config:
+            return config
+        
+        config = await self.acreate_agent_config(task_description, user_id, usage)
+        await classification_cache.set(task_description, config)
+        return config
+    
+    async def aresolve_fused(self, task_description: str, user_id: Optional[str] = None, usage: Optional[CompletionUsage] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Like aresolve_agent_config, but if the LLM is needed it answers the task in the same call.
+        
+        The output is None when the config came from the cache or classifier,
+        or when the fused reply wasn't valid JSON (e.g. truncated at
+        FUSED_MAX_TOKENS); the config is then asked for on its own.
+        """
+        config = await self.alookup_agent_config(task_description)
+        if config:
+            return config, None
+        
+        try:
+            config, output = await self.acreate_config_and_execute(task_description, user_id, usage)
+        except json.JSONDecodeError:
+            return await self.aresolve_agent_config(task_description, user_id, usage), None
+        except BadRequestError as e:
+            if not is_json_validation_error(e):
+                raise
+            return await self.aresolve_agent_config(task_description, user_id, usage), None
+        await classification_cache.set(task_description, config)
+        return config, output
+    
     def build_agent_from_config(self, config: Dict[str, Any], task_description: str) -> Dict[str, Any]:
         agent_type_str = config.get("agent_type", "CUSTOM").upper()
         try:
@@ -93,19 +303,135 @@ Respond with a JSON object:
             }
         }
     
-    def execute_with_agent(self, agent: Agent, input_data: str) -> str:
-        messages = [
-            {"role": "system", "content": agent.system_prompt},
-            {"role": "user", "content": input_data}
-        ]
+    async def aexecute_with_usage(self, agent: Agent, input_data: str) -> Tuple[str, CompletionUsage]:
+        usage, stream = await self.aopen_stream(agent, input_data)
+        output = "".join([token async for token in stream])
+        return output, usage
+    
+    @staticmethod
+    def model_chain(agent: Agent) -> List[str]:
+        models = [agent.model]
+        for model in (agent.agent_metadata or {}).get("fallback_models") or []:
+            if model not in models:
+                models.append(model)
+        return models
+    
+    @staticmethod
+    def hedge_delay(agent: Agent) -> Optional[float]:
+        metadata = agent.agent_metadata or {}
+        if not metadata.get("hedge", settings.LLM_HEDGING_ENABLED):
+            return None
+        if metadata.get("hedge_delay") is not None:
+            return float(metadata["hedge_delay"])
+        p95 = latency_tracker.percentile(agent.model)
+        return p95 if p95 is not None else settings.LLM_HEDGE_DEFAULT_DELAY
+    
+    async def aopen_stream(self, agent: Agent, input_data: str, messages: Optional[List[Dict[str, str]]] = None) -> Tuple[CompletionUsage, AsyncIterator[str]]:
+        """Start a completion, failing over along the agent's model chain.
         
-        response = self.groq_client.chat.completions.create(
-            model=agent.model,
-            messages=messages,
-            temperature=float(agent.temperature),
-            max_tokens=int(agent.max_tokens)
-        )
+        Returns the usage of the request that won (its model is the one that
+        served it; token counts are filled in once the stream is exhausted)
+        and an iterator over its tokens; the first token has already arrived.
+        With hedging, the next model in the chain is raced once the current
+        one exceeds the hedge delay, and whichever produces a first token
+        first wins while the other request is cancelled.
+        
+        messages replaces the default [system prompt, input_data] prompt.
+        """
+        messages = messages or self._build_execution_messages(agent, input_data)
+        models = self.model_chain(agent)
+        delay = self.hedge_delay(agent)
+        last_error: Optional[BaseException] = None
         
-        return response.choices[0].message.content
+        i = 0
+        while i < len(models):
+            attempts = [asyncio.create_task(self._start_stream(agent, models[i], messages))]
+            try:
+                if delay is not None and i + 1 < len(models):
+                    done, _ = await asyncio.wait(attempts, timeout=delay)
+                    if not done:
+                        attempts.append(asyncio.create_task(self._start_stream(agent, models[i + 1], messages)))
+                
+                winner = None
+                pending = set(attempts)
+                while pending and winner is None:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for attempt in done:
+                        if attempt.exception() is not None:
+                            last_error = attempt.exception()
+                        elif winner is None:
+                            winner = attempt.result()
+                        else:
+                            await attempt.result()[2].aclose()
+                
+                if winner is not None:
+                    usage, first_token, stream = winner
+                    return usage, self._prepend(first_token, stream)
+            finally:
+                for attempt in attempts:
+                    if not attempt.done():
+                        attempt.cancel()
+            i += len(attempts)
+        
+        raise last_error
+    
+    async def _start_stream(self, agent: Agent, model: str, messages: List[Dict[str, str]]) -> Tuple[CompletionUsage, str, AsyncIterator[str]]:
+        usage = CompletionUsage(model)
+        stream = self._stream_model(agent, model, messages, usage)
+        start_time = time.monotonic()
+        try:
+            first_token = await asyncio.wait_for(stream.__anext__(), timeout=settings.LLM_FIRST_TOKEN_TIMEOUT)
+        except StopAsyncIteration:
+            first_token = ""
+        except BaseException:
+            await stream.aclose()
+            raise
+        elapsed = time.monotonic() - start_time
+        latency_tracker.record(model, elapsed)
+        LLM_TIME_TO_FIRST_TOKEN.labels(model).observe(elapsed)
+        usage.ttft_ms = int(elapsed * 1000)
+        return usage, first_token, stream
+    
+    @staticmethod
+    async def _prepend(first_token: str, stream: AsyncIterator[str]) -> AsyncIterator[str]:
+        if first_token:
+            yield first_token
+        async for token in stream:
+            yield token
+    
+    async def _stream_model(self, agent: Agent, model: str, messages: List[Dict[str, str]], usage: CompletionUsage) -> AsyncIterator[str]:
+        # The slot is held until the last token; only opening the stream is
+        # retried since a 429/5xx surfaces before any token is sent
+        start_time = time.monotonic()
+        outcome = "error"
+        try:
+            async with llm_scheduler.slot(agent.user_id):
+                stream = await llm_scheduler.call_with_retries(
+                    model,
+                    self._estimate_tokens(messages, agent.max_tokens),
+                    lambda: self.async_groq_client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=agent.temperature,
+                        max_tokens=agent.max_tokens,
+                        stream=True
+                    )
+                )
+                
+                async for chunk in stream:
+                    content = getattr(chunk.choices[0].delta, "content", None) if chunk.choices else None
+                    if content:
+                        yield content
+                    # Groq reports usage on the final chunk only
+                    if getattr(chunk, "x_groq", None) is not None:
+                        record_llm_usage(model, chunk.x_groq.usage)
+                        usage.add(model, chunk.x_groq.usage)
+            outcome = "ok"
+        except (GeneratorExit, asyncio.CancelledError):
+            # Lost a hedged race or the consumer went away
+            outcome = "cancelled"
+            raise
+        finally:
+            LLM_REQUEST_DURATION.labels(model, outcome).observe(time.monotonic() - start_time)
 
 agent_factory = AgentFactory()
@@ -0,0 +1,89 @@
+from typing import Optional
+import hashlib
+import json
+import time
+
+from app.core.config import settings
+from app.core.redis_client import RedisClient, redis_client
+from app.models.agent import Agent
+
+class ResponseCache:
+    """Exact-match cache of agent completions in Redis.
+    
+    Keys are a hash of the normalized (system_prompt, model, temperature,
+    max_tokens, input_data). Callers only store answers served by
+    agent.model (execution_service skips fallback replies), since the key
+    would pass them off as the primary's. Entries expire after
+    RESPONSE_CACHE_TTL and the oldest are evicted once
+    RESPONSE_CACHE_MAX_ENTRIES is exceeded. Hit/miss counters live in Redis so
+    the rate covers every worker.
+    """
+    
+    prefix = "response_cache"
+    
+    def __init__(self, client: RedisClient):
+        self.client = client
+    
+    @staticmethod
+    def is_enabled_for(agent: Agent) -> bool:
+        if float(agent.temperature) == 0:
+            return True
+        return bool((agent.agent_metadata or {}).get("response_cache"))
+    
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return text.replace("\r\n", "\n").strip()
+    
+    def key_for(self, agent: Agent, input_data: str) -> str:
+        payload = json.dumps({
+            "system_prompt": self._normalize(agent.system_prompt),
+            "model": agent.model,
+            "temperature": float(agent.temperature),
+            "max_tokens": int(agent.max_tokens),
+            "input_data": self._normalize(input_data)
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    async def get(self, agent: Agent, input_data: str) -> Optional[str]:
+        if not self.client.redis:
+            return None
+        digest = self.key_for(agent, input_data)
+        try:
+            output = await self.client.redis.get(f"{self.prefix}:{digest}")
+            await self.client.redis.incr(f"{self.prefix}:stats:{'hits' if output is not None else 'misses'}")
+        except Exception:
+            return None
+        return output
+    
+    async def set(self, agent: Agent, input_data: str, output: str):
+        if not self.client.redis or len(output.encode()) > settings.RESPONSE_CACHE_MAX_ENTRY_BYTES:
+            return
+        digest = self.key_for(agent, input_data)
+        index = f"{self.prefix}:index"
+        try:
+            await self.client.redis.set(f"{self.prefix}:{digest}", output, ex=settings.RESPONSE_CACHE_TTL)
+            now = time.time()
+            await self.client.redis.zadd(index, {digest: now})
+            await self.client.redis.zremrangebyscore(index, "-inf", now - settings.RESPONSE_CACHE_TTL)
+            overflow = await self.client.redis.zcard(index) - settings.RESPONSE_CACHE_MAX_ENTRIES
+            if overflow > 0:
+                evicted = await self.client.redis.zpopmin(index, overflow)
+                if evicted:
+                    await self.client.redis.delete(*[f"{self.prefix}:{member}" for member, _ in evicted])
+        except Exception:
+            pass
+    
+    async def stats(self) -> dict:
+        if not self.client.redis:
+            return {}
+        hits, misses = await self.client.redis.mget(f"{self.prefix}:stats:hits", f"{self.prefix}:stats:misses")
+        hits, misses = int(hits or 0), int(misses or 0)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "size": await self.client.redis.zcard(f"{self.prefix}:index"),
+            "hit_rate": hits / total if total else 0.0
+        }
+
+response_cache = ResponseCache(redis_client)
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+import asyncio
+import json
+import time
+
+from app.core.config import settings
+from app.core.redis_client import RedisClient, redis_client
+from app.models.agent import Agent, AgentType
+
+class AgentRuntime:
+    """Ready-to-send spec of a saved agent.
+    
+    Carries the fields the factory and response cache read from an Agent,
+    already typed, plus the system message prefix built once per version.
+    """
+    
+    def __init__(self, agent: Agent):
+        self.id: UUID = agent.id
+        self.user_id: str = agent.user_id
+        self.agent_type: AgentType = agent.agent_type
+        self.model: str = agent.model
+        self.temperature = float(agent.temperature)
+        self.max_tokens = int(agent.max_tokens)
+        self.system_prompt: str = agent.system_prompt
+        self.agent_metadata: Dict[str, Any] = dict(agent.agent_metadata or {})
+        self.updated_at: Optional[datetime] = agent.updated_at
+        self.prefix: List[Dict[str, str]] = [{"role": "system", "content": agent.system_prompt}]
+    
+    def messages(self, input_data: str) -> List[Dict[str, str]]:
+        return [*self.prefix, {"role": "user", "content": input_data}]
+
+class AgentRuntimeCache:
+    """In-process LRU of AgentRuntime by agent id, one version per entry.
+    
+    Updates and deletes are announced on a Redis pub/sub channel so every
+    replica drops its copy; the TTL bounds staleness if an announcement is
+    missed while a subscriber reconnects. An invalidation also records the
+    version it was for, so a load that raced with the update can't put the
+    older version back.
+    """
+    
+    channel = "agent_runtime:invalidate"
+    
+    def __init__(
+        self,
+        client: RedisClient,
+        maxsize: int = settings.AGENT_RUNTIME_CACHE_SIZE,
+        ttl: float = settings.AGENT_RUNTIME_CACHE_TTL
+    ):
+        self.client = client
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[UUID, Tuple[AgentRuntime, float]]" = OrderedDict()
+        # agent id -> oldest version still allowed in; None once deleted
+        self._floors: "OrderedDict[UUID, Optional[datetime]]" = OrderedDict()
+        self._listener: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, agent_id: UUID) -> Optional[AgentRuntime]:
+        entry = self._entries.get(agent_id)
+        if entry:
+            runtime, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(agent_id)
+                self.hits += 1
+                return runtime
+            del self._entries[agent_id]
+        self.misses += 1
+        return None
+    
+    def store(self, agent: Agent) -> AgentRuntime:
+        runtime = AgentRuntime(agent)
+        if agent.id in self._floors:
+            floor = self._floors[agent.id]
+            if floor is None or (runtime.updated_at and runtime.updated_at < floor):
+                return runtime
+        self._entries[agent.id] = (runtime, time.monotonic() + self.ttl)
+        self._entries.move_to_end(agent.id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return runtime
+    
+    def _drop(self, agent_id: UUID, updated_at: Optional[datetime]):
+        self._entries.pop(agent_id, None)
+        self._floors[agent_id] = updated_at
+        self._floors.move_to_end(agent_id)
+        while len(self._floors) > self.maxsize:
+            self._floors.popitem(last=False)
+    
+    async def invalidate(self, agent_id: UUID, updated_at: Optional[datetime] = None):
+        """Drop an agent everywhere; updated_at is its new version, None if deleted."""
+        self._drop(agent_id, updated_at)
+        if not self.client.redis:
+            return
+        message = {"agent_id": str(agent_id), "updated_at": updated_at.isoformat() if updated_at else None}
+        try:
+            await self.client.redis.publish(self.channel, json.dumps(message))
+        except Exception:
+            pass
+    
+    async def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.redis.pubsub()
+                await pubsub.subscribe(self.channel)
+                # Announcements made while unsubscribed were missed
+                self._entries.clear()
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        data = json.loads(message["data"])
+                        updated_at = datetime.fromisoformat(data["updated_at"]) if data["updated_at"] else None
+                        self._drop(UUID(data["agent_id"]), updated_at)
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(1)
+    
+    def start(self):
+        if self.client.redis and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+    
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+    
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+agent_runtime_cache = AgentRuntimeCache(redis_client)
@@ -0,0 +1,223 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+import asyncio
+import random
+import time
+
+import groq
+
+from app.core.config import settings
+from app.core.redis_client import RedisClient, redis_client
+
+T = TypeVar("T")
+
+# Two token buckets (requests, tokens) checked and debited atomically; returns
+# the seconds to wait before retrying, or "0" once both have been debited
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local wait = 0
+local levels = {}
+for i = 1, 2 do
+    local capacity = tonumber(ARGV[i * 3 - 1])
+    local rate = tonumber(ARGV[i * 3])
+    local cost = math.min(tonumber(ARGV[i * 3 + 1]), capacity)
+    local state = redis.call('HMGET', KEYS[i], 'level', 'ts')
+    local level = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    level = math.min(capacity, level + math.max(0, now - ts) * rate)
+    levels[i] = {level, cost}
+    if level < cost then
+        wait = math.max(wait, (cost - level) / rate)
+    end
+end
+for i = 1, 2 do
+    local level = levels[i][1]
+    if wait == 0 then
+        level = level - levels[i][2]
+    end
+    redis.call('HSET', KEYS[i], 'level', level, 'ts', now)
+    redis.call('EXPIRE', KEYS[i], 120)
+end
+return tostring(wait)
+"""
+
+class FairSlots:
+    """Concurrency limiter that hands out free slots round-robin per user.
+    
+    One user flooding the scheduler only ever gets every Nth free slot, where
+    N is the number of users currently waiting.
+    """
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiting: "OrderedDict[str, deque]" = OrderedDict()
+    
+    @property
+    def waiting(self) -> int:
+        return sum(len(q) for q in self._waiting.values())
+    
+    async def acquire(self, user_id: str):
+        if self.active < self.limit and not self._waiting:
+            self.active += 1
+            return
+        
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(user_id, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                queue = self._waiting.get(user_id)
+                if queue and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self._waiting[user_id]
+            raise
+    
+    def release(self):
+        self.active -= 1
+        while self.active < self.limit and self._waiting:
+            user_id, queue = self._waiting.popitem(last=False)
+            future = queue.popleft()
+            if queue:
+                self._waiting[user_id] = queue
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+
+class LLMScheduler:
+    """Admission control in front of every LLM call.
+    
+    Each call takes a fair per-user concurrency slot, then debits the model's
+    requests-per-minute and tokens-per-minute buckets (shared across workers
+    through Redis, local when Redis is down) using the caller's estimate,
+    then runs with jittered exponential backoff on 429/5xx and connection
+    errors.
+    """
+    
+    def __init__(self, client: RedisClient):
+        self.client = client
+        self.slots = FairSlots(settings.LLM_MAX_CONCURRENCY)
+        self._script = None
+        self._local_buckets: Dict[str, Tuple[float, float]] = {}
+    
+    @staticmethod
+    def limits_for(model: str) -> Tuple[int, int]:
+        limits = settings.LLM_RATE_LIMITS.get(model, {})
+        return limits.get("rpm", settings.LLM_DEFAULT_RPM), limits.get("tpm", settings.LLM_DEFAULT_TPM)
+    
+    @staticmethod
+    def estimate_tokens(prompt_chars: int, max_tokens: int) -> int:
+        # ~4 characters per token for the prompt plus the completion budget
+        return prompt_chars // 4 + max_tokens
+    
+    def _local_reserve(self, model: str, rpm: int, tpm: int, tokens: int) -> float:
+        now = time.monotonic()
+        wait = 0.0
+        state = []
+        for key, capacity, cost in ((f"{model}:requests", rpm, 1), (f"{model}:tokens", tpm, tokens)):
+            rate = capacity / 60
+            cost = min(cost, capacity)
+            level, ts = self._local_buckets.get(key, (capacity, now))
+            level = min(capacity, level + (now - ts) * rate)
+            if level < cost:
+                wait = max(wait, (cost - level) / rate)
+            state.append((key, level, cost))
+        
+        for key, level, cost in state:
+            self._local_buckets[key] = (level - cost if wait == 0 else level, now)
+        return wait
+    
+    async def _reserve(self, model: str, tokens: int) -> float:
+        rpm, tpm = self.limits_for(model)
+        if self.client.redis:
+            try:
+                if self._script is None:
+                    self._script = self.client.redis.register_script(TOKEN_BUCKET_SCRIPT)
+                wait = await self._script(
+                    keys=[f"llm:bucket:{model}:requests", f"llm:bucket:{model}:tokens"],
+                    args=[time.time(), rpm, rpm / 60, 1, tpm, tpm / 60, tokens]
+                )
+                return float(wait)
+            except Exception:
+                pass
+        return self._local_reserve(model, rpm, tpm, tokens)
+    
+    async def _wait_for_budget(self, model: str, tokens: int):
+        while True:
+            wait = await self._reserve(model, tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait + random.uniform(0, 0.1))
+    
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to back off before retrying ``error``, or None if it isn't retryable."""
+        if isinstance(error, (groq.APIConnectionError, groq.APITimeoutError)):
+            retry_after = None
+        elif isinstance(error, groq.APIStatusError) and (error.status_code == 429 or error.status_code >= 500):
+            retry_after = error.response.headers.get("retry-after")
+        else:
+            return None
+        
+        backoff = min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * 2 ** attempt)
+        delay = random.uniform(0, backoff)
+        try:
+            if retry_after:
+                delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+        return min(delay, settings.LLM_RETRY_MAX_DELAY)
+    
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[str]):
+        await self.slots.acquire(user_id or "")
+        try:
+            yield
+        finally:
+            self.slots.release()
+    
+    async def call_with_retries(self, model: str, estimated_tokens: int, call: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            await self._wait_for_budget(model, estimated_tokens)
+            try:
+                return await call()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None or attempt >= settings.LLM_MAX_RETRIES:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+    
+    async def run(self, model: str, estimated_tokens: int, user_id: Optional[str], call: Callable[[], Awaitable[T]]) -> T:
+        async with self.slot(user_id):
+            return await self.call_with_retries(model, estimated_tokens, call)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"active": self.slots.active, "waiting": self.slots.waiting, "limit": self.slots.limit}
+
+class LatencyTracker:
+    """Sliding window of time-to-first-token samples per model."""
+    
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, deque] = {}
+    
+    def record(self, model: str, seconds: float):
+        self._samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+    
+    def percentile(self, model: str, q: float = 0.95) -> Optional[float]:
+        samples = self._samples.get(model)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+llm_scheduler = LLMScheduler(redis_client)
+latency_tracker = LatencyTracker()
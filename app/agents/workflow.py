@@ -0,0 +1,90 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypedDict, Annotated
+import asyncio
+import re
+
+from langgraph.graph import StateGraph, END
+
+from app.models.agent import Agent, AgentType
+from app.agents.templates import get_template
+
+PLACEHOLDER = re.compile(r"\{([A-Za-z0-9_-]+)\}")
+
+def merge_outputs(current: Optional[Dict[str, str]], update: Optional[Dict[str, str]]) -> Dict[str, str]:
+    return {**(current or {}), **(update or {})}
+
+class WorkflowState(TypedDict):
+    # Step outputs by step name; parallel branches merge their writes
+    outputs: Annotated[dict, merge_outputs]
+
+def render_prompt(step: Dict[str, Any], input_data: str, outputs: Dict[str, str]) -> str:
+    values = {"input": input_data, **{name: outputs[name] for name in step.get("depends_on", [])}}
+    referenced = set(PLACEHOLDER.findall(step.get("prompt") or "{input}"))
+    # Only known names are substituted so literal braces in prompts survive
+    prompt = PLACEHOLDER.sub(lambda match: values.get(match.group(1), match.group(0)), step.get("prompt") or "{input}")
+    for name in step.get("depends_on", []):
+        if name not in referenced:
+            prompt += f"\n\n## Output of {name}\n{outputs[name]}"
+    return prompt
+
+def template_agent(agent_type: str, user_id: str) -> Agent:
+    """An unsaved agent built from AGENT_TEMPLATES for a workflow step."""
+    agent_type = AgentType(agent_type)
+    template = get_template(agent_type)
+    return Agent(
+        user_id=user_id,
+        name=f"{agent_type.value.title()} Agent",
+        agent_type=agent_type,
+        system_prompt=template["system_prompt"],
+        capabilities=template["capabilities"],
+        model="llama-3.3-70b-versatile",
+        temperature=template["temperature"],
+        max_tokens=template["max_tokens"],
+        agent_metadata={"created_from": "template"}
+    )
+
+def step_levels(steps: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Group steps by dependency depth; every step's dependencies sit in earlier levels."""
+    depth = {step["name"]: 0 for step in steps}
+    # Definitions are validated acyclic, so this settles within len(steps) passes
+    for _ in steps:
+        for step in steps:
+            depth[step["name"]] = max([depth[dependency] + 1 for dependency in step.get("depends_on", [])] or [0])
+    levels = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for step in steps:
+        levels[depth[step["name"]]].append(step)
+    return levels
+
+def build_workflow_graph(steps: List[Dict[str, Any]], run_step: Callable[[Dict[str, Any], Dict[str, str]], Awaitable[str]]):
+    """Compile a workflow definition into a langgraph graph.
+    
+    Each dependency level is one node and the steps inside it run
+    concurrently. langgraph can't join several edges into one node, so
+    levels are chained rather than wiring steps to each other directly.
+    Steps already present in the initial outputs (finished before a crash)
+    are not run again.
+    """
+    graph = StateGraph(WorkflowState)
+    
+    def make_node(level: List[Dict[str, Any]]):
+        async def node(state: Dict[str, Any]):
+            outputs = state["outputs"]
+            pending = [step for step in level if step["name"] not in outputs]
+            # Let siblings finish so their outputs are kept for a resume
+            results = await asyncio.gather(*(run_step(step, outputs) for step in pending), return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            return {"outputs": {step["name"]: result for step, result in zip(pending, results)}}
+        
+        return node
+    
+    levels = step_levels(steps)
+    names = [f"level_{index}" for index in range(len(levels))]
+    for name, level in zip(names, levels):
+        graph.add_node(name, make_node(level))
+    graph.set_entry_point(names[0])
+    for current, following in zip(names, names[1:]):
+        graph.add_edge(current, following)
+    graph.add_edge(names[-1], END)
+    
+    return graph.compile()
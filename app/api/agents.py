@@ -1,77 +1,124 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union, Literal
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.auth import get_current_user
-from app.schemas.agent import AgentCreate, AgentUpdate, AgentResponse
+from app.core.pagination import decode_cursor, next_cursor, NEXT_CURSOR_HEADER
+from app.core.ndjson import NDJSON_MEDIA_TYPE
+from app.schemas.agent import AgentCreate, AgentUpdate, AgentResponse, AgentSummary, AgentBulkFromTemplates, AgentImportReport
 from app.services.agent_service import agent_service
 from app.models.agent import AgentType
 
 router = APIRouter()
 
 @router.post("/create", response_model=AgentResponse, status_code=201)
-def create_agent(
+async def create_agent(
     agent_data: AgentCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user)
 ):
-    agent = agent_service.create_agent(db, agent_data, user_id)
+    agent = await agent_service.acreate_agent(db, agent_data, user_id)
     return agent
 
 @router.post("/create-from-template", response_model=AgentResponse, status_code=201)
-def create_agent_from_template(
+async def create_agent_from_template(
     agent_type: AgentType,
     name: str,
     description: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user)
 ):
-    agent = agent_service.create_agent_from_template(db, agent_type, name, user_id, description)
+    agent = await agent_service.acreate_agent_from_template(db, agent_type, name, user_id, description)
     return agent
 
+@router.post("/bulk-from-template", response_model=List[AgentResponse], status_code=201)
+async def create_agents_from_templates(
+    bulk_data: AgentBulkFromTemplates,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    return await agent_service.acreate_agents_from_templates(db, bulk_data.items, user_id)
+
+@router.post("/import", response_model=AgentImportReport)
+async def import_agents(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    """Create agents from an NDJSON body, one AgentCreate object per line.
+    
+    Valid lines are created even when others fail; the report lists the
+    failures by line number. GET /export output can be imported as is.
+    """
+    return await agent_service.aimport_agents(db, request.stream(), user_id)
+
+@router.get("/export")
+async def export_agents(
+    agent_type: Optional[AgentType] = None,
+    user_id: str = Depends(get_current_user)
+):
+    async def lines():
+        async for agent in agent_service.astream_agents(user_id, agent_type):
+            yield AgentResponse.model_validate(agent).model_dump_json() + "\n"
+    
+    return StreamingResponse(
+        lines(),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="agents.ndjson"'}
+    )
+
 @router.get("/{agent_id}", response_model=AgentResponse)
-def get_agent(
+async def get_agent(
     agent_id: UUID, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user)
 ):
-    agent = agent_service.get_agent(db, agent_id, user_id)
+    agent = await agent_service.aget_agent(db, agent_id, user_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     return agent
 
-@router.get("/", response_model=List[AgentResponse])
-def get_all_agents(
+@router.get("/", response_model=Union[List[AgentResponse], List[AgentSummary]])
+async def get_all_agents(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     agent_type: Optional[AgentType] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    fields: Literal["full", "summary"] = "full",
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user)
 ):
-    agents = agent_service.get_all_agents(db, user_id, skip, limit, agent_type)
+    agents = await agent_service.aget_all_agents(db, user_id, skip, limit, agent_type, decode_cursor(cursor), summary=fields == "summary")
+    next_page = next_cursor(agents, limit)
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    if fields == "summary":
+        return [AgentSummary.model_validate(row) for row in agents]
     return agents
 
 @router.put("/{agent_id}", response_model=AgentResponse)
-def update_agent(
+async def update_agent(
     agent_id: UUID,
     agent_data: AgentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user)
 ):
-    agent = agent_service.update_agent(db, agent_id, agent_data, user_id)
+    agent = await agent_service.aupdate_agent(db, agent_id, agent_data, user_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     return agent
 
 @router.delete("/{agent_id}")
-def delete_agent(
+async def delete_agent(
     agent_id: UUID, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user)
 ):
-    success = agent_service.delete_agent(db, agent_id, user_id)
+    success = await agent_service.adelete_agent(db, agent_id, user_id)
     if not success:
         raise HTTPException(status_code=404, detail="Agent not found")
     return {"message": "Agent deleted successfully", "agent_id": str(agent_id)}
\ No newline at end of file
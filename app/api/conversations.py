@@ -0,0 +1,131 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from uuid import UUID
+import json
+
+from app.core.database import get_async_db
+from app.core.auth import get_current_user
+from app.core.pagination import decode_cursor, next_cursor, NEXT_CURSOR_HEADER
+from app.schemas.conversation import ConversationCreate, ConversationResponse, MessageCreate, MessageResponse
+from app.services.conversation_service import conversation_service, TurnInProgress
+
+router = APIRouter()
+
+TURN_CONFLICT = "Another message was sent to this conversation at the same time"
+
+@router.post("/", response_model=ConversationResponse, status_code=201)
+async def create_conversation(
+    conversation_data: ConversationCreate,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    try:
+        return await conversation_service.acreate_conversation(db, conversation_data, user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/{conversation_id}", response_model=ConversationResponse)
+async def get_conversation(
+    conversation_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    conversation = await conversation_service.aget_conversation(db, conversation_id, user_id)
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return conversation
+
+@router.get("/{conversation_id}/messages", response_model=List[MessageResponse])
+async def get_messages(
+    conversation_id: UUID,
+    after_seq: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    messages = await conversation_service.aget_messages(db, conversation_id, user_id, after_seq, limit)
+    if messages is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return messages
+
+@router.post("/{conversation_id}/messages")
+async def send_message(
+    conversation_id: UUID,
+    message: MessageCreate,
+    user_id: str = Depends(get_current_user)
+):
+    # No request-scoped session: the reply can take a while
+    try:
+        turn = await conversation_service.astart_turn(conversation_id, user_id, message.content)
+    except TurnInProgress:
+        raise HTTPException(status_code=409, detail=TURN_CONFLICT)
+    if not turn:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    try:
+        reply = "".join([token async for token in turn.tokens])
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail=TURN_CONFLICT)
+    return {
+        "conversation_id": conversation_id,
+        "seq": turn.seq,
+        "role": "assistant",
+        "content": reply
+    }
+
+@router.post("/{conversation_id}/messages/stream")
+async def send_message_stream(
+    conversation_id: UUID,
+    message: MessageCreate,
+    user_id: str = Depends(get_current_user)
+):
+    try:
+        turn = await conversation_service.astart_turn(conversation_id, user_id, message.content)
+    except TurnInProgress:
+        raise HTTPException(status_code=409, detail=TURN_CONFLICT)
+    if not turn:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    async def event_source():
+        try:
+            async for token in turn.tokens:
+                yield f"event: token\ndata: {json.dumps({'type': 'token', 'content': token})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+            return
+        yield f"event: done\ndata: {json.dumps({'type': 'done', 'seq': turn.seq})}\n\n"
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/", response_model=List[ConversationResponse])
+async def get_all_conversations(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    agent_id: Optional[UUID] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    conversations = await conversation_service.aget_all_conversations(db, user_id, skip, limit, agent_id, decode_cursor(cursor))
+    next_page = next_cursor(conversations, limit)
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    return conversations
+
+@router.delete("/{conversation_id}")
+async def delete_conversation(
+    conversation_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    success = await conversation_service.adelete_conversation(db, conversation_id, user_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return {"message": "Conversation deleted successfully", "conversation_id": str(conversation_id)}
@@ -1,12 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header, Response, WebSocket
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple, Union, Literal
 from uuid import UUID
+from datetime import datetime
+import asyncio
+import json
 
-from app.core.database import get_db
-from app.core.auth import get_current_user
-from app.schemas.execution import ExecutionCreate, ExecutionResponse
-from app.services.execution_service import execution_service
+from app.core.database import get_async_db, get_async_session_factory
+from app.core.auth import get_current_user, authenticate_token
+from app.core.pagination import decode_cursor, next_cursor, NEXT_CURSOR_HEADER
+from app.core.config import settings
+from app.core.job_queue import job_queue, JOB_EXECUTION
+from app.core.event_stream import execution_events
+from app.core.export import EXPORT_MEDIA_TYPES, encode_rows, gzip_chunks
+from app.models.execution import ExecutionStatus
+from app.schemas.execution import ExecutionCreate, ExecutionResponse, ExecutionSummary, BatchExecutionCreate, BatchExecutionResponse, BatchProgressResponse
+from app.services.execution_service import execution_service, EXPORT_FIELDS
 
 router = APIRouter()
 
@@ -14,47 +24,207 @@ router = APIRouter()
 async def execute_agent(
     execution_data: ExecutionCreate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user)
 ):
     try:
-        execution = execution_service.create_execution(db, execution_data, user_id)
+        execution = await execution_service.acreate_execution(db, execution_data, user_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     
-    background_tasks.add_task(execution_service.process_execution, db, execution.id)
+    if settings.JOB_QUEUE_ENABLED:
+        await job_queue.enqueue(JOB_EXECUTION, {"execution_id": str(execution.id)})
+    else:
+        background_tasks.add_task(execution_service.process_execution, execution.id)
     
     return execution
 
+@router.post("/batch", response_model=BatchExecutionResponse, status_code=201)
+async def execute_batch(
+    batch_data: BatchExecutionCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    try:
+        batch, execution_ids = await execution_service.acreate_batch(db, batch_data, user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    if settings.JOB_QUEUE_ENABLED:
+        await job_queue.enqueue_many(JOB_EXECUTION, [{"execution_id": str(execution_id)} for execution_id in execution_ids])
+    else:
+        background_tasks.add_task(execution_service.process_batch, execution_ids)
+    
+    return {
+        "batch_id": batch.id,
+        "agent_id": batch.agent_id,
+        "total": batch.total,
+        "execution_ids": execution_ids,
+        "created_at": batch.created_at
+    }
+
+@router.get("/batch/{batch_id}", response_model=BatchProgressResponse)
+async def get_batch_progress(
+    batch_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    progress = await execution_service.aget_batch_progress(db, batch_id, user_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return progress
+
+@router.get("/export")
+async def export_executions(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    agent_id: Optional[UUID] = None,
+    gzip: bool = False,
+    user_id: str = Depends(get_current_user)
+):
+    """Stream executions created in [start, end) as NDJSON or CSV, oldest first."""
+    rows = await execution_service.aopen_export(user_id, start, end, agent_id)
+    body = encode_rows(rows, EXPORT_FIELDS, format, settings.EXPORT_FLUSH_BYTES)
+    filename = f"executions.{format}"
+    media_type = EXPORT_MEDIA_TYPES[format]
+    if gzip:
+        body = gzip_chunks(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/{execution_id}", response_model=ExecutionResponse)
-def get_execution(
+async def get_execution(
     execution_id: UUID, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user)
 ):
-    execution = execution_service.get_execution(db, execution_id, user_id)
+    execution = await execution_service.aget_execution_cached(db, execution_id, user_id)
     if not execution:
         raise HTTPException(status_code=404, detail="Execution not found")
     return execution
 
-@router.get("/", response_model=List[ExecutionResponse])
-def get_all_executions(
+async def _get_execution_snapshot(execution_id: UUID, user_id: str) -> Optional[Dict[str, Any]]:
+    # Streams can stay open for minutes, so don't hold a request-scoped session
+    async with get_async_session_factory()() as db:
+        return await execution_service.aget_execution_cached(db, execution_id, user_id)
+
+async def _execution_events(
+    execution_id: UUID,
+    snapshot: Dict[str, Any],
+    last_event_id: Optional[str] = None
+) -> AsyncIterator[Optional[Tuple[str, Dict[str, Any]]]]:
+    finished = snapshot["status"] in (ExecutionStatus.COMPLETED.value, ExecutionStatus.FAILED.value)
+    if finished and not await execution_events.exists(execution_id):
+        # Event log already expired; replay the stored result
+        if snapshot["status"] == ExecutionStatus.COMPLETED.value:
+            yield "0-1", {"type": "token", "content": snapshot["output"] or ""}
+            yield "0-2", {"type": "done", "status": snapshot["status"]}
+        else:
+            yield "0-1", {"type": "error", "status": snapshot["status"], "error": snapshot["error"]}
+        return
+    
+    async for item in execution_events.listen(execution_id, last_event_id):
+        yield item
+
+@router.get("/{execution_id}/stream")
+async def stream_execution(
+    execution_id: UUID,
+    last_event_id: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user)
+):
+    snapshot = await _get_execution_snapshot(execution_id, user_id)
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Execution not found")
+    
+    async def event_source():
+        async for item in _execution_events(execution_id, snapshot, last_event_id):
+            if item is None:
+                yield ": keepalive\n\n"
+                continue
+            event_id, event = item
+            yield f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/{execution_id}/ws")
+async def stream_execution_ws(websocket: WebSocket, execution_id: UUID, token: Optional[str] = None):
+    # Browsers can't set headers on a WebSocket handshake, so the token comes as a query param
+    try:
+        user_id = await authenticate_token(token or "")
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    
+    snapshot = await _get_execution_snapshot(execution_id, user_id)
+    if not snapshot:
+        await websocket.close(code=1008)
+        return
+    
+    await websocket.accept()
+    
+    async def relay():
+        async for item in _execution_events(execution_id, snapshot):
+            if item is None:
+                continue
+            event_id, event = item
+            await websocket.send_json({"id": event_id, **event})
+    
+    async def wait_for_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    
+    # The relay only notices a closed socket when it sends, which an idle
+    # execution may not do for minutes; watch the receive side as well
+    relaying = asyncio.create_task(relay())
+    watching = asyncio.create_task(wait_for_disconnect())
+    try:
+        await asyncio.wait({relaying, watching}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (relaying, watching):
+            task.cancel()
+        await asyncio.gather(relaying, watching, return_exceptions=True)
+    
+    if relaying.done() and not relaying.cancelled() and relaying.exception() is None:
+        await websocket.close()
+
+@router.get("/", response_model=Union[List[ExecutionResponse], List[ExecutionSummary]])
+async def get_all_executions(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     agent_id: Optional[UUID] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    fields: Literal["full", "summary"] = "full",
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user)
 ):
-    executions = execution_service.get_all_executions(db, user_id, skip, limit, agent_id)
+    executions = await execution_service.aget_all_executions(db, user_id, skip, limit, agent_id, decode_cursor(cursor), summary=fields == "summary")
+    next_page = next_cursor(executions, limit)
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    if fields == "summary":
+        return [ExecutionSummary.model_validate(row) for row in executions]
     return executions
 
 @router.delete("/{execution_id}")
-def delete_execution(
+async def delete_execution(
     execution_id: UUID, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user)
 ):
-    success = execution_service.delete_execution(db, execution_id, user_id)
+    success = await execution_service.adelete_execution(db, execution_id, user_id)
     if not success:
         raise HTTPException(status_code=404, detail="Execution not found")
     return {"message": "Execution deleted successfully", "execution_id": str(execution_id)}
\ No newline at end of file
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union, Literal
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.auth import get_current_user
-from app.schemas.task import TaskCreate, TaskResponse
+from app.core.pagination import decode_cursor, next_cursor, NEXT_CURSOR_HEADER
+from app.core.config import settings
+from app.core.job_queue import job_queue, JOB_TASK
+from app.schemas.task import TaskCreate, TaskResponse, TaskSummary
 from app.services.task_service import task_service
 
 router = APIRouter()
@@ -14,60 +17,71 @@ router = APIRouter()
 async def create_task(
     task_data: TaskCreate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user)
 ):
-    task = task_service.create_task(db, task_data, user_id)
+    task = await task_service.acreate_task(db, task_data, user_id)
     
-    background_tasks.add_task(task_service.process_task, db, task.id)
+    if settings.JOB_QUEUE_ENABLED:
+        await job_queue.enqueue(JOB_TASK, {"task_id": str(task.id)})
+    else:
+        background_tasks.add_task(task_service.process_task, task.id)
     
     return task
 
 @router.get("/{task_id}", response_model=TaskResponse)
-def get_task(
+async def get_task(
     task_id: UUID, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user)
 ):
-    task = task_service.get_task(db, task_id, user_id)
+    task = await task_service.aget_task_cached(db, task_id, user_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
 
 @router.get("/{task_id}/result")
-def get_task_result(
+async def get_task_result(
     task_id: UUID, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user)
 ):
-    task = task_service.get_task(db, task_id, user_id)
+    task = await task_service.aget_task_cached(db, task_id, user_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
     return {
-        "task_id": str(task.id),
-        "status": task.status,
-        "result": task.result,
-        "error": task.error
+        "task_id": task["id"],
+        "status": task["status"],
+        "result": task["result"],
+        "error": task["error"]
     }
 
-@router.get("/", response_model=List[TaskResponse])
-def get_all_tasks(
+@router.get("/", response_model=Union[List[TaskResponse], List[TaskSummary]])
+async def get_all_tasks(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    fields: Literal["full", "summary"] = "full",
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user)
 ):
-    tasks = task_service.get_all_tasks(db, user_id, skip, limit)
+    tasks = await task_service.aget_all_tasks(db, user_id, skip, limit, decode_cursor(cursor), summary=fields == "summary")
+    next_page = next_cursor(tasks, limit)
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    if fields == "summary":
+        return [TaskSummary.model_validate(row) for row in tasks]
     return tasks
 
 @router.delete("/{task_id}")
-def delete_task(
+async def delete_task(
     task_id: UUID, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user)
 ):
-    success = task_service.delete_task(db, task_id, user_id)
+    success = await task_service.adelete_task(db, task_id, user_id)
     if not success:
         raise HTTPException(status_code=404, detail="Task not found")
     return {"message": "Task deleted successfully", "task_id": str(task_id)}
\ No newline at end of file
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Literal
+from uuid import UUID
+from datetime import datetime
+
+from app.core.database import get_async_db
+from app.core.auth import get_current_user
+from app.schemas.usage import UsageRow
+from app.services.usage_service import usage_service
+
+router = APIRouter()
+
+@router.get("/executions", response_model=List[UsageRow])
+async def get_execution_usage(
+    group_by: List[Literal["agent", "day"]] = Query([]),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    agent_id: Optional[UUID] = None,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    return await usage_service.aget_execution_usage(db, user_id, group_by, start, end, agent_id)
+
+@router.get("/tasks", response_model=List[UsageRow])
+async def get_task_usage(
+    group_by: List[Literal["agent", "day"]] = Query([]),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    agent_id: Optional[UUID] = None,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    return await usage_service.aget_task_usage(db, user_id, group_by, start, end, agent_id)
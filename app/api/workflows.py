@@ -0,0 +1,102 @@
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from uuid import UUID
+
+from app.core.database import get_async_db
+from app.core.auth import get_current_user
+from app.core.pagination import decode_cursor, next_cursor, NEXT_CURSOR_HEADER
+from app.core.config import settings
+from app.core.job_queue import job_queue, JOB_WORKFLOW
+from app.schemas.workflow import WorkflowCreate, WorkflowResponse, WorkflowRunCreate, WorkflowRunResponse
+from app.services.workflow_service import workflow_service
+
+router = APIRouter()
+
+@router.post("/", response_model=WorkflowResponse, status_code=201)
+async def create_workflow(
+    workflow_data: WorkflowCreate,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    try:
+        return await workflow_service.acreate_workflow(db, workflow_data, user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/runs/{run_id}", response_model=WorkflowRunResponse)
+async def get_run(
+    run_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    run = await workflow_service.aget_run(db, run_id, user_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Workflow run not found")
+    return run
+
+@router.get("/{workflow_id}", response_model=WorkflowResponse)
+async def get_workflow(
+    workflow_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    workflow = await workflow_service.aget_workflow(db, workflow_id, user_id)
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    return workflow
+
+@router.post("/{workflow_id}/runs", response_model=WorkflowRunResponse, status_code=202)
+async def run_workflow(
+    workflow_id: UUID,
+    run_data: WorkflowRunCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    run = await workflow_service.acreate_run(db, workflow_id, run_data, user_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    
+    if settings.JOB_QUEUE_ENABLED:
+        await job_queue.enqueue(JOB_WORKFLOW, {"run_id": str(run.id)})
+    else:
+        background_tasks.add_task(workflow_service.process_run, run.id)
+    
+    return run
+
+@router.get("/{workflow_id}/runs", response_model=List[WorkflowRunResponse])
+async def get_runs(
+    workflow_id: UUID,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    return await workflow_service.aget_runs(db, workflow_id, user_id, skip, limit)
+
+@router.get("/", response_model=List[WorkflowResponse])
+async def get_all_workflows(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    workflows = await workflow_service.aget_all_workflows(db, user_id, skip, limit, decode_cursor(cursor))
+    next_page = next_cursor(workflows, limit)
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    return workflows
+
+@router.delete("/{workflow_id}")
+async def delete_workflow(
+    workflow_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user)
+):
+    success = await workflow_service.adelete_workflow(db, workflow_id, user_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    return {"message": "Workflow deleted successfully", "workflow_id": str(workflow_id)}
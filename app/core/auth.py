@@ -1,26 +1,225 @@
 from fastapi import Header, HTTPException
-from typing import Optional
+from typing import Optional, Callable, Dict, Tuple
+from collections import OrderedDict
+import asyncio
+import hashlib
 import jwt
 import os
 import requests
-from functools import lru_cache
+import threading
+import time
 
-# Cache the JWKS for 1 hour
-@lru_cache(maxsize=1)
-def get_clerk_jwks():
+from app.core.redis_client import redis_client
+
+def get_clerk_jwks_url() -> str:
+    jwks_url = os.getenv("CLERK_JWKS_URL")
+    if jwks_url:
+        return jwks_url
+    
+    clerk_domain = os.getenv("CLERK_DOMAIN")
+    if not clerk_domain:
+        raise HTTPException(status_code=500, detail="CLERK_DOMAIN not configured")
+    return f"https://{clerk_domain}/.well-known/jwks.json"
+
+def fetch_clerk_jwks() -> dict:
     """Fetch Clerk's public keys for JWT verification"""
-    clerk_domain = os.getenv("CLERK_DOMAIN", "clerk.your-domain.com")
-    jwks_url = f"https://{clerk_domain}/.well-known/jwks.json"
+    response = requests.get(get_clerk_jwks_url(), timeout=5)
+    response.raise_for_status()
+    return response.json()
+
+class JWKSCache:
+    """Process-wide cache of signing keys keyed by ``kid``.
     
-    try:
-        response = requests.get(jwks_url, timeout=5)
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        print(f"Error fetching JWKS: {e}")
+    Fetches never run on the event loop. Keys are refreshed in a background
+    thread once they are older than ``ttl - refresh_ahead``, and an empty
+    cache is filled through ``asyncio.to_thread``. Past the TTL the cached
+    keys are still served while refreshes are retried, so a JWKS outage
+    doesn't fail every request. A token with an unknown ``kid`` (key
+    rotation) waits for one refetch and is rejected only if the key is still
+    missing. Refetches start at most once per ``refresh_cooldown`` seconds,
+    and a cold fill fails fast for that long after a failed fetch.
+    ``fetcher`` can be swapped for a local JWKS stub in tests.
+    """
+    
+    def __init__(
+        self,
+        fetcher: Callable[[], dict] = fetch_clerk_jwks,
+        ttl: float = float(os.getenv("CLERK_JWKS_TTL", "3600")),
+        refresh_ahead: float = 300,
+        refresh_cooldown: float = 30
+    ):
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.refresh_ahead = min(refresh_ahead, ttl / 2)
+        self.refresh_cooldown = refresh_cooldown
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._fetched_at = 0.0
+        self._last_attempt = float("-inf")
+        self._last_failure = float("-inf")
+        self._lock = threading.Lock()
+        self._cold_fill = asyncio.Lock()
+        self._refreshing = False
+    
+    def refresh(self):
+        try:
+            jwk_set = jwt.PyJWKSet.from_dict(self.fetcher())
+        except Exception:
+            self._last_failure = time.monotonic()
+            raise
+        keys = {key.key_id: key for key in jwk_set.keys if key.key_id}
+        with self._lock:
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+    
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            # Keep serving the cached keys until the next attempt
+            print(f"Error refreshing JWKS: {e}")
+        finally:
+            self._refreshing = False
+    
+    def _start_attempt(self) -> bool:
+        """Claim the next refetch if the cooldown allows one."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_attempt < self.refresh_cooldown:
+                return False
+            self._last_attempt = now
+            return True
+    
+    def _refresh_in_background(self):
+        if self._refreshing or not self._start_attempt():
+            return
+        self._refreshing = True
+        threading.Thread(target=self._background_refresh, daemon=True).start()
+    
+    def warm(self):
+        self._refresh_in_background()
+    
+    async def _fill(self):
+        async with self._cold_fill:
+            if self._keys:
+                return
+            if time.monotonic() - self._last_failure < self.refresh_cooldown:
+                raise jwt.InvalidTokenError("Signing keys are unavailable")
+            await asyncio.to_thread(self.refresh)
+    
+    async def _refetch_for(self, kid: str):
+        async with self._cold_fill:
+            # A request waiting on the same rotation may have fetched it already
+            if kid in self._keys or not self._start_attempt():
+                return
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"Error refreshing JWKS: {e}")
+    
+    async def get_signing_key(self, kid: str) -> jwt.PyJWK:
+        if not self._keys:
+            await self._fill()
+        elif time.monotonic() - self._fetched_at > self.ttl - self.refresh_ahead:
+            self._refresh_in_background()
+        
+        key = self._keys.get(kid)
+        if key is None:
+            # Possibly a rotated key
+            await self._refetch_for(kid)
+            key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unable to find a signing key that matches: {kid}")
+        return key
+    
+    async def get_signing_key_from_jwt(self, token: str) -> jwt.PyJWK:
+        header = jwt.get_unverified_header(token)
+        return await self.get_signing_key(header.get("kid"))
+
+jwks_cache = JWKSCache()
+
+class TokenCache:
+    """Bounded LRU of already-verified tokens: sha256(token) -> (sub, exp).
+    
+    Entries are dropped once the token expires. With ``use_redis`` the cache
+    is shared across replicas through Redis, keyed the same way and expiring
+    with the token.
+    """
+    
+    def __init__(
+        self,
+        maxsize: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000")),
+        use_redis: bool = os.getenv("TOKEN_CACHE_REDIS", "false").lower() == "true"
+    ):
+        self.maxsize = maxsize
+        self.use_redis = use_redis
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _hash(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+    
+    def _store(self, key: str, sub: str, exp: float):
+        self._entries[key] = (sub, exp)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    async def get(self, token: str) -> Optional[str]:
+        key = self._hash(token)
+        now = time.time()
+        
+        entry = self._entries.get(key)
+        if entry:
+            sub, exp = entry
+            if exp > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return sub
+            del self._entries[key]
+        
+        if self.use_redis:
+            try:
+                cached = await redis_client.get(f"auth:token:{key}")
+            except Exception:
+                cached = None
+            if isinstance(cached, dict) and cached.get("exp", 0) > now:
+                self._store(key, cached["sub"], cached["exp"])
+                self.hits += 1
+                return cached["sub"]
+        
+        self.misses += 1
         return None
+    
+    async def set(self, token: str, sub: str, exp: Optional[float]):
+        if not exp:
+            return
+        ttl = int(exp - time.time())
+        if ttl <= 0:
+            return
+        
+        key = self._hash(token)
+        self._store(key, sub, exp)
+        
+        if self.use_redis:
+            try:
+                await redis_client.set(f"auth:token:{key}", {"sub": sub, "exp": exp}, expire=ttl)
+            except Exception:
+                pass
+    
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+token_cache = TokenCache()
 
-def verify_clerk_token(token: str) -> dict:
+async def verify_clerk_token(token: str) -> dict:
     """Verify Clerk JWT token"""
     
     # For development only - skip verification
@@ -33,17 +232,8 @@ def verify_clerk_token(token: str) -> dict:
     
     # Production - verify with Clerk's public key
     try:
-        from jwt import PyJWKClient
-        
-        clerk_domain = os.getenv("CLERK_DOMAIN")
-        if not clerk_domain:
-            raise HTTPException(status_code=500, detail="CLERK_DOMAIN not configured")
-        
-        jwks_url = f"https://{clerk_domain}/.well-known/jwks.json"
-        jwks_client = PyJWKClient(jwks_url)
-        
         # Get the signing key
-        signing_key = jwks_client.get_signing_key_from_jwt(token)
+        signing_key = await jwks_cache.get_signing_key_from_jwt(token)
         
         # Verify and decode
         decoded = jwt.decode(
@@ -55,6 +245,8 @@ def verify_clerk_token(token: str) -> dict:
         
         return decoded
         
+    except HTTPException:
+        raise
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
     except jwt.InvalidTokenError as e:
@@ -62,27 +254,38 @@ def verify_clerk_token(token: str) -> dict:
     except Exception as e:
         raise HTTPException(status_code=401, detail=f"Token verification failed: {str(e)}")
 
-async def get_current_user(authorization: Optional[str] = Header(None)) -> str:
-    """Extract and verify user from authorization header"""
-    
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header required")
+async def authenticate_token(token: str) -> str:
+    """Verify a bare bearer token and return its user id"""
     
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header format")
-    
-    token = authorization.replace("Bearer ", "")
+    cached_user_id = await token_cache.get(token)
+    if cached_user_id:
+        return cached_user_id
     
     try:
-        decoded = verify_clerk_token(token)
+        decoded = await verify_clerk_token(token)
         user_id = decoded.get("sub")
         
         if not user_id:
             raise HTTPException(status_code=401, detail="User ID not found in token")
         
+        await token_cache.set(token, user_id, decoded.get("exp"))
+        
         return user_id
         
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=401, detail=f"Authentication failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail=f"Authentication failed: {str(e)}")
+
+async def get_current_user(authorization: Optional[str] = Header(None)) -> str:
+    """Extract and verify user from authorization header"""
+    
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Authorization header required")
+    
+    if not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Invalid authorization header format")
+    
+    token = authorization.replace("Bearer ", "")
+    
+    return await authenticate_token(token)
\ No newline at end of file
@@ -1,10 +1,134 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional, Dict
 
 class Settings(BaseSettings):
     GROQ_API_KEY: str
     DATABASE_URL: str
     REDIS_URL: str
+    # Defaults to DATABASE_URL rewritten for the asyncpg driver
+    DATABASE_ASYNC_URL: Optional[str] = None
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    
+    # Point at a Groq-compatible server (e.g. a local fake) instead of api.groq.com
+    GROQ_BASE_URL: Optional[str] = None
+    GROQ_MAX_CONNECTIONS: int = 500
+    GROQ_MAX_KEEPALIVE_CONNECTIONS: int = 100
+    GROQ_TIMEOUT: float = 120.0
+    
+    # LLM scheduler: per-model request/token budgets shared across workers via
+    # Redis, e.g. LLM_RATE_LIMITS='{"llama-3.3-70b-versatile": {"rpm": 30, "tpm": 6000}}'
+    LLM_RATE_LIMITS: Dict[str, Dict[str, int]] = {}
+    LLM_DEFAULT_RPM: int = 1000
+    LLM_DEFAULT_TPM: int = 300000
+    LLM_MAX_CONCURRENCY: int = 200
+    LLM_MAX_RETRIES: int = 4
+    LLM_RETRY_BASE_DELAY: float = 0.5
+    LLM_RETRY_MAX_DELAY: float = 20.0
+    
+    # Tail latency: a model that hasn't produced a first token within the
+    # timeout fails over to the next one in agent_metadata["fallback_models"];
+    # with hedging on, the next model is also raced once the primary is
+    # slower than its observed p95 time-to-first-token
+    LLM_FIRST_TOKEN_TIMEOUT: float = 60.0
+    LLM_HEDGING_ENABLED: bool = False
+    LLM_HEDGE_DEFAULT_DELAY: float = 5.0
+    
+    # USD per million tokens, used to price executions and tasks; models not
+    # listed are recorded at zero cost
+    LLM_PRICING: Dict[str, Dict[str, float]] = {
+        "llama-3.3-70b-versatile": {"input": 0.59, "output": 0.79},
+        "llama-3.1-8b-instant": {"input": 0.05, "output": 0.08},
+    }
+    
+    # Background jobs go through a Redis stream consumed by worker.py;
+    # disable to run them in-process with FastAPI BackgroundTasks
+    JOB_QUEUE_ENABLED: bool = True
+    JOB_QUEUE_STREAM: str = "jobs"
+    JOB_QUEUE_GROUP: str = "workers"
+    JOB_VISIBILITY_TIMEOUT: int = 300
+    # Running jobs refresh their idle time this often so they aren't
+    # reclaimed while still in progress; keep well under the timeout
+    JOB_HEARTBEAT_INTERVAL: int = 60
+    JOB_MAX_RETRIES: int = 3
+    WORKER_CONCURRENCY: int = 50
+    # Port for the worker's Prometheus endpoint; 0 disables it. Each worker
+    # process needs its own port, so set it per process when running several
+    # on one host (a taken port is logged and metrics are skipped)
+    WORKER_METRICS_PORT: int = 9810
+    # The API and workers won't start against a schema behind the latest migration
+    SCHEMA_CHECK_ON_STARTUP: bool = True
+    
+    # /readyz fails when a dependency check exceeds the timeout, the async DB
+    # pool is this full, or the oldest undelivered job has waited this long
+    READINESS_TIMEOUT: float = 2.0
+    READINESS_MAX_POOL_USAGE: float = 0.9
+    READINESS_MAX_QUEUE_LAG: float = 60.0
+    
+    # POST /api/executions/batch limits; BATCH_CONCURRENCY only applies when
+    # running in-process (the worker pool bounds queued jobs)
+    BATCH_MAX_ITEMS: int = 5000
+    BATCH_CONCURRENCY: int = 20
+    
+    # NDJSON agent import/export: rows are inserted and fetched in chunks;
+    # the import report keeps at most AGENT_IMPORT_MAX_ERRORS row errors
+    AGENT_IMPORT_CHUNK_SIZE: int = 500
+    AGENT_IMPORT_MAX_LINE_BYTES: int = 1_000_000
+    AGENT_IMPORT_MAX_ERRORS: int = 1000
+    
+    # Execution export: rows fetched per server-side cursor round trip, and
+    # how much encoded output is buffered before it is sent
+    EXPORT_FETCH_SIZE: int = 1000
+    EXPORT_FLUSH_BYTES: int = 65536
+    
+    # Read-through cache for task/execution polling; rows that are still
+    # pending/running get the short TTL to bound staleness
+    STATUS_CACHE_TTL: int = 3600
+    STATUS_CACHE_ACTIVE_TTL: int = 5
+    
+    # Streamed tokens are coalesced for this long before being published
+    STREAM_FLUSH_INTERVAL: float = 0.05
+    
+    # Exact-match LLM response cache (opt-in per agent, always on at temperature 0)
+    RESPONSE_CACHE_TTL: int = 86400
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000
+    RESPONSE_CACHE_MAX_ENTRY_BYTES: int = 65536
+    
+    # In-process cache of prepared agent specs; updates and deletes are
+    # broadcast over Redis pub/sub, the TTL covers missed broadcasts
+    AGENT_RUNTIME_CACHE_SIZE: int = 1000
+    AGENT_RUNTIME_CACHE_TTL: float = 300.0
+    
+    # Task classification: cached LLM answers plus a local TF-IDF classifier
+    # trained on past tasks that may answer instead of the LLM when confident
+    CLASSIFICATION_CACHE_TTL: int = 604800
+    CLASSIFIER_ENABLED: bool = True
+    CLASSIFIER_TRAINING_ROWS: int = 5000
+    CLASSIFIER_RETRAIN_INTERVAL: int = 3600
+    CLASSIFIER_MIN_CLASS_SAMPLES: int = 20
+    CLASSIFIER_MIN_SCORE: float = 0.35
+    CLASSIFIER_MIN_MARGIN: float = 0.15
+    
+    # Conversations send the system prompt, a rolling summary and the recent
+    # turns; once those exceed the context budget (agent_metadata
+    # ["context_tokens"] overrides it) the oldest turns are folded into the
+    # summary until the rest fits in CONVERSATION_SUMMARY_TARGET of the budget
+    CONVERSATION_CONTEXT_TOKENS: int = 6000
+    CONVERSATION_SUMMARY_TARGET: float = 0.5
+    CONVERSATION_SUMMARY_MODEL: str = "llama-3.1-8b-instant"
+    CONVERSATION_SUMMARY_MAX_TOKENS: int = 600
+    # A turn holds a Redis lock on its conversation from before the model is
+    # called until the reply is stored, so a concurrent send gets a 409
+    # without paying for a reply; the TTL frees a slot a crashed turn held
+    CONVERSATION_TURN_LOCK_TTL: int = 300
+    
+    # Workflows: DAGs of agent steps run by worker.py (or BackgroundTasks)
+    WORKFLOW_MAX_STEPS: int = 50
+    
+    # Classify and answer a task in one structured completion instead of two
+    # sequential calls; tasks can also opt in with task_metadata["fused"]
+    TASK_PIPELINE_FUSED: bool = False
     
     class Config:
         env_file = ".env"
@@ -1,30 +1,103 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from contextlib import asynccontextmanager
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+import time
 from app.core.config import settings
+from app.core.metrics import DB_POOL_CHECKOUT_DURATION, DB_POOL_IN_USE
 
 Base = declarative_base()
 
+class _TimedCheckout:
+    metrics_label = ""
+    
+    def _do_get(self):
+        start_time = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_DURATION.labels(self.metrics_label).observe(time.perf_counter() - start_time)
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    metrics_label = "sync"
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
 def init_db():
     engine = create_engine(
         settings.DATABASE_URL,
+        poolclass=TimedQueuePool,
         pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW
     )
     return engine
 
-engine = None
-SessionLocal = None
+def get_async_database_url():
+    url = make_url(settings.DATABASE_ASYNC_URL or settings.DATABASE_URL)
+    connect_args = {}
+    # asyncpg does not understand libpq's sslmode/channel_binding query parameters
+    sslmode = url.query.get("sslmode")
+    url = url.difference_update_query(["sslmode", "channel_binding"])
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = sslmode
+    if url.drivername in ("postgresql", "postgresql+psycopg2", "postgres"):
+        url = url.set(drivername="postgresql+asyncpg")
+    return url, connect_args
 
-def get_db():
-    global engine, SessionLocal
-    if engine is None:
-        engine = init_db()
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    
-    db = SessionLocal()
-    try:
+def init_async_db():
+    url, connect_args = get_async_database_url()
+    async_engine = create_async_engine(
+        url,
+        connect_args=connect_args,
+        poolclass=TimedAsyncQueuePool,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW
+    )
+    return async_engine
+
+async_engine = None
+AsyncSessionLocal = None
+
+DB_POOL_IN_USE.labels("async").set_function(lambda: async_engine.pool.checkedout() if async_engine is not None else 0)
+
+def get_async_session_factory():
+    global async_engine, AsyncSessionLocal
+    if async_engine is None:
+        async_engine = init_async_db()
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return AsyncSessionLocal
+
+def get_async_engine():
+    get_async_session_factory()
+    return async_engine
+
+async def dispose_async_db():
+    global async_engine, AsyncSessionLocal
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = None
+        AsyncSessionLocal = None
+
+async def get_async_db():
+    async with get_async_session_factory()() as db:
         yield db
-    finally:
-        db.close()
+
+@asynccontextmanager
+async def async_session_scope():
+    """Short-lived session for background work; commits on success.
+    
+    Objects stay usable after the block exits so callers can release the
+    connection before slow work such as an LLM call.
+    """
+    async with get_async_session_factory()() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
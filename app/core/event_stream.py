@@ -0,0 +1,82 @@
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from uuid import UUID
+import json
+
+from app.core.redis_client import RedisClient, redis_client
+
+TERMINAL_EVENTS = ("done", "error")
+# Tells subscribers to discard what an earlier attempt streamed
+RESET_EVENT = "reset"
+
+class ExecutionEventStream:
+    """Per-execution event log on a Redis stream.
+    
+    The worker running an execution appends status/token events; any API
+    replica can relay them to clients. Unlike plain pub/sub, a subscriber that
+    connects mid-generation replays the events it missed and can resume from
+    a Last-Event-ID without gaps or duplicates. When a job is taken over after
+    its worker died, the new attempt starts with a reset event and the failed
+    attempt's events are trimmed, so later subscribers only replay the new
+    one.
+    """
+    
+    def __init__(self, client: RedisClient, expire: int = 3600, maxlen: int = 10000):
+        self.client = client
+        self.expire = expire
+        self.maxlen = maxlen
+    
+    @staticmethod
+    def key(execution_id: UUID) -> str:
+        return f"execution:{execution_id}:events"
+    
+    async def publish(self, execution_id: UUID, event_type: str, **data: Any):
+        if not self.client.redis:
+            return
+        key = self.key(execution_id)
+        await self.client.redis.xadd(key, {"data": json.dumps({"type": event_type, **data})}, maxlen=self.maxlen, approximate=True)
+        await self.client.redis.expire(key, self.expire)
+    
+    async def reset(self, execution_id: UUID):
+        """Start a new attempt, dropping the events of the previous one."""
+        if not self.client.redis:
+            return
+        key = self.key(execution_id)
+        event_id = await self.client.redis.xadd(key, {"data": json.dumps({"type": RESET_EVENT})}, maxlen=self.maxlen, approximate=True)
+        await self.client.redis.xtrim(key, minid=event_id, approximate=False)
+        await self.client.redis.expire(key, self.expire)
+    
+    async def exists(self, execution_id: UUID) -> bool:
+        if not self.client.redis:
+            return False
+        return bool(await self.client.redis.exists(self.key(execution_id)))
+    
+    async def delete(self, execution_id: UUID):
+        await self.client.delete(self.key(execution_id))
+    
+    async def listen(
+        self,
+        execution_id: UUID,
+        last_event_id: Optional[str] = None,
+        block_ms: int = 15000
+    ) -> AsyncIterator[Optional[Tuple[str, Dict[str, Any]]]]:
+        """Yield (event_id, event) until a terminal event; None on idle timeout."""
+        if not self.client.redis:
+            raise Exception("Redis not connected")
+        key = self.key(execution_id)
+        last_id = last_event_id or "0-0"
+        
+        while True:
+            response = await self.client.redis.xread({key: last_id}, count=100, block=block_ms)
+            if not response:
+                yield None
+                continue
+            
+            for _, messages in response:
+                for message_id, fields in messages:
+                    last_id = message_id
+                    event = json.loads(fields["data"])
+                    yield message_id, event
+                    if event["type"] in TERMINAL_EVENTS:
+                        return
+
+execution_events = ExecutionEventStream(redis_client)
@@ -0,0 +1,57 @@
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, AsyncIterator, List, Sequence
+from uuid import UUID
+import csv
+import io
+import json
+import zlib
+
+from app.core.ndjson import NDJSON_MEDIA_TYPE
+
+EXPORT_MEDIA_TYPES = {"ndjson": NDJSON_MEDIA_TYPE, "csv": "text/csv"}
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+async def encode_rows(rows: AsyncIterator[Sequence[Any]], fields: List[str], format: str, flush_bytes: int) -> AsyncIterator[bytes]:
+    """Serialize rows as NDJSON or CSV, yielding roughly flush_bytes at a time.
+    
+    CSV starts with a header row; JSON columns are written as JSON text.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if format == "csv":
+        writer.writerow(fields)
+    
+    async for row in rows:
+        values = [_plain(value) for value in row]
+        if format == "csv":
+            writer.writerow([json.dumps(value) if isinstance(value, (dict, list)) else value for value in values])
+        else:
+            buffer.write(json.dumps(dict(zip(fields, values)), ensure_ascii=False))
+            buffer.write("\n")
+        if buffer.tell() >= flush_bytes:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
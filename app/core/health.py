@@ -0,0 +1,70 @@
+from sqlalchemy import text
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import time
+
+from app.core.config import settings
+from app.core.database import get_async_engine
+from app.core.redis_client import redis_client
+from app.core.job_queue import job_queue
+
+class DependencyDegraded(Exception):
+    """A dependency answered but is outside its readiness threshold."""
+    
+    def __init__(self, message: str, detail: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.detail = detail or {}
+
+async def _check_database():
+    # Also times out when the pool is exhausted and no connection frees up
+    async with get_async_engine().connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+async def _check_redis():
+    await redis_client.ping()
+
+async def _check_db_pool() -> Dict[str, Any]:
+    in_use = get_async_engine().pool.checkedout()
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    detail = {"in_use": in_use, "capacity": capacity}
+    if in_use >= capacity * settings.READINESS_MAX_POOL_USAGE:
+        raise DependencyDegraded("pool saturated", detail)
+    return detail
+
+async def _check_job_queue() -> Dict[str, Any]:
+    lag = await job_queue.lag()
+    detail = {"lag_seconds": round(lag, 1), "depth": await job_queue.depth()}
+    if lag > settings.READINESS_MAX_QUEUE_LAG:
+        raise DependencyDegraded("queue lagging", detail)
+    return detail
+
+async def _run_check(check: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> Dict[str, Any]:
+    start_time = time.perf_counter()
+    result: Dict[str, Any] = {"status": "ok"}
+    try:
+        detail = await asyncio.wait_for(check(), timeout=settings.READINESS_TIMEOUT)
+        if detail:
+            result.update(detail)
+    except asyncio.TimeoutError:
+        result = {"status": "timeout"}
+    except DependencyDegraded as e:
+        result = {"status": "degraded", "error": str(e), **e.detail}
+    except Exception as e:
+        result = {"status": "error", "error": str(e)}
+    result["latency_ms"] = round((time.perf_counter() - start_time) * 1000, 1)
+    return result
+
+async def check_readiness() -> Dict[str, Any]:
+    """Run every dependency check concurrently and report each one."""
+    checks = {
+        "database": _check_database,
+        "redis": _check_redis,
+        "db_pool": _check_db_pool,
+    }
+    if settings.JOB_QUEUE_ENABLED:
+        checks["job_queue"] = _check_job_queue
+    
+    results = await asyncio.gather(*(_run_check(check) for check in checks.values()))
+    report = dict(zip(checks, results))
+    ready = all(result["status"] == "ok" for result in report.values())
+    return {"status": "ready" if ready else "unavailable", "checks": report}
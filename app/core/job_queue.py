@@ -0,0 +1,141 @@
+from redis.exceptions import ResponseError
+from typing import Any, Dict, List
+import json
+import socket
+import time
+import os
+
+from app.core.config import settings
+from app.core.redis_client import RedisClient, redis_client
+
+JOB_EXECUTION = "execution"
+JOB_TASK = "task"
+JOB_WORKFLOW = "workflow"
+
+class Job:
+    def __init__(self, message_id: str, fields: Dict[str, str], attempts: int = 1):
+        self.message_id = message_id
+        self.fields = fields
+        self.job_type = fields.get("type")
+        self.payload = json.loads(fields.get("payload") or "{}")
+        self.attempts = attempts
+
+class JobQueue:
+    """Durable job queue on a Redis stream with a consumer group.
+    
+    A job stays in the group's pending list until a worker acks it. The
+    worker running it touches it every JOB_HEARTBEAT_INTERVAL; jobs whose
+    worker died (or raised) go idle and are reclaimed by another worker once
+    idle for longer than the visibility timeout, and moved to a dead-letter
+    stream after JOB_MAX_RETRIES deliveries.
+    """
+    
+    def __init__(
+        self,
+        client: RedisClient,
+        stream: str = settings.JOB_QUEUE_STREAM,
+        group: str = settings.JOB_QUEUE_GROUP,
+        visibility_timeout: int = settings.JOB_VISIBILITY_TIMEOUT,
+        max_retries: int = settings.JOB_MAX_RETRIES
+    ):
+        self.client = client
+        self.stream = stream
+        self.group = group
+        self.dead_letter_stream = f"{stream}:dead"
+        self.visibility_timeout_ms = visibility_timeout * 1000
+        self.max_retries = max_retries
+    
+    @property
+    def redis(self):
+        if not self.client.redis:
+            raise Exception("Redis not connected")
+        return self.client.redis
+    
+    async def ensure_group(self):
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+    
+    async def enqueue(self, job_type: str, payload: Dict[str, Any]) -> str:
+        return await self.redis.xadd(self.stream, {"type": job_type, "payload": json.dumps(payload)})
+    
+    async def enqueue_many(self, job_type: str, payloads: List[Dict[str, Any]], chunk_size: int = 500) -> int:
+        for start in range(0, len(payloads), chunk_size):
+            pipe = self.redis.pipeline(transaction=False)
+            for payload in payloads[start:start + chunk_size]:
+                pipe.xadd(self.stream, {"type": job_type, "payload": json.dumps(payload)})
+            await pipe.execute()
+        return len(payloads)
+    
+    async def depth(self) -> int:
+        return await self.redis.xlen(self.stream)
+    
+    async def lag(self) -> float:
+        """Seconds the oldest job not yet handed to a worker has been waiting."""
+        groups = await self.redis.xinfo_groups(self.stream)
+        last_delivered = next((group["last-delivered-id"] for group in groups if group["name"] == self.group), "0-0")
+        entries = await self.redis.xrange(self.stream, min=f"({last_delivered}", count=1)
+        if not entries:
+            return 0.0
+        # Stream ids start with the millisecond timestamp they were added at
+        enqueued_ms = int(entries[0][0].split("-")[0])
+        return max(0.0, time.time() - enqueued_ms / 1000)
+    
+    async def pending(self) -> int:
+        info = await self.redis.xpending(self.stream, self.group)
+        return info["pending"]
+    
+    async def reserve(self, consumer: str, count: int = 1, block_ms: int = 5000) -> List[Job]:
+        jobs = await self._reclaim(consumer, count)
+        if jobs:
+            return jobs
+        
+        response = await self.redis.xreadgroup(self.group, consumer, {self.stream: ">"}, count=count, block=block_ms)
+        for _, messages in response or []:
+            for message_id, fields in messages:
+                jobs.append(Job(message_id, fields))
+        return jobs
+    
+    async def _reclaim(self, consumer: str, count: int) -> List[Job]:
+        _, messages, *_ = await self.redis.xautoclaim(
+            self.stream, self.group, consumer, self.visibility_timeout_ms, start_id="0-0", count=count
+        )
+        jobs = []
+        for message_id, fields in messages:
+            if fields is None:
+                # Trimmed from the stream while pending
+                await self.ack(message_id)
+                continue
+            attempts = await self._delivery_count(message_id)
+            if attempts > self.max_retries:
+                await self.dead_letter(message_id, fields, "max retries exceeded")
+                continue
+            jobs.append(Job(message_id, fields, attempts))
+        return jobs
+    
+    async def _delivery_count(self, message_id: str) -> int:
+        entries = await self.redis.xpending_range(self.stream, self.group, min=message_id, max=message_id, count=1)
+        # Unknown counts are treated as exhausted so a poison job can't loop forever
+        if not entries or entries[0].get("times_delivered") is None:
+            return self.max_retries + 1
+        return entries[0]["times_delivered"]
+    
+    async def touch(self, message_id: str, consumer: str):
+        """Reset a pending job's idle time so it isn't reclaimed while it runs."""
+        # JUSTID leaves the delivery count alone
+        await self.redis.xclaim(self.stream, self.group, consumer, 0, [message_id], justid=True)
+    
+    async def ack(self, message_id: str):
+        await self.redis.xack(self.stream, self.group, message_id)
+        await self.redis.xdel(self.stream, message_id)
+    
+    async def dead_letter(self, message_id: str, fields: Dict[str, str], reason: str):
+        await self.redis.xadd(self.dead_letter_stream, {**fields, "error": reason, "message_id": message_id})
+        await self.ack(message_id)
+
+def default_consumer_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+job_queue = JobQueue(redis_client)
@@ -0,0 +1,112 @@
+from prometheus_client import Counter, Gauge, Histogram, generate_latest
+from typing import Any, Optional
+import time
+
+# Model calls run for seconds to minutes, well past the default buckets
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"]
+)
+
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds",
+    "Time from sending a completion request to its last token",
+    ["model", "outcome"],
+    buckets=LLM_BUCKETS
+)
+
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from sending a streaming completion request to its first token",
+    ["model"],
+    buckets=LLM_BUCKETS
+)
+
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens reported by the provider",
+    ["model", "kind"]
+)
+
+DB_POOL_CHECKOUT_DURATION = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a pooled database connection",
+    ["pool"],
+    buckets=FAST_BUCKETS
+)
+
+DB_POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Database connections currently checked out",
+    ["pool"]
+)
+
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Redis command round-trip latency",
+    ["command"],
+    buckets=FAST_BUCKETS
+)
+
+JOB_QUEUE_DEPTH = Gauge(
+    "job_queue_depth",
+    "Jobs in the queue stream, and those delivered but not yet acked",
+    ["state"]
+)
+
+JOB_DURATION = Histogram(
+    "job_duration_seconds",
+    "Background job duration by final status",
+    ["job", "status"],
+    buckets=LLM_BUCKETS
+)
+
+def record_llm_usage(model: str, usage: Optional[Any]):
+    if usage is None:
+        return
+    if usage.prompt_tokens:
+        LLM_TOKENS.labels(model, "prompt").inc(usage.prompt_tokens)
+    if usage.completion_tokens:
+        LLM_TOKENS.labels(model, "completion").inc(usage.completion_tokens)
+
+def render_metrics() -> bytes:
+    return generate_latest()
+
+class MetricsMiddleware:
+    """Records request latency labelled by route template rather than raw path.
+
+    Plain ASGI rather than BaseHTTPMiddleware so streaming responses pass
+    through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status)
+            ).observe(time.perf_counter() - start_time)
+
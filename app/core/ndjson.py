@@ -0,0 +1,37 @@
+from typing import AsyncIterator, Optional, Tuple
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """Split a byte stream into (line number, text) without buffering the body.
+    
+    Blank lines are skipped but still counted. A line longer than
+    max_line_bytes is discarded as it streams in and yielded as None so the
+    caller can report it.
+    """
+    buffer = b""
+    line_no = 0
+    oversized = False
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            newline = buffer.find(b"\n")
+            if newline < 0:
+                break
+            line, buffer = buffer[:newline], buffer[newline + 1:]
+            line_no += 1
+            if oversized:
+                oversized = False
+                yield line_no, None
+            elif len(line) > max_line_bytes:
+                yield line_no, None
+            elif line.strip():
+                yield line_no, line.decode("utf-8", errors="replace")
+        if len(buffer) > max_line_bytes:
+            oversized = True
+            buffer = b""
+    
+    if oversized or len(buffer) > max_line_bytes:
+        yield line_no + 1, None
+    elif buffer.strip():
+        yield line_no + 1, buffer.decode("utf-8", errors="replace")
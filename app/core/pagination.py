@@ -0,0 +1,47 @@
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import load_only
+from datetime import datetime
+from typing import Any, Iterable, Optional, Tuple
+from uuid import UUID
+import base64
+import json
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    payload = json.dumps({"c": created_at.isoformat(), "i": str(row_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, UUID]]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["c"]), UUID(payload["i"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def next_cursor(rows: list, limit: int) -> Optional[str]:
+    """Cursor for the page after ``rows``, or None if this was the last page."""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.created_at, last.id)
+
+def paginate(query: Select, model: Any, skip: int, limit: int, cursor: Optional[Tuple[datetime, UUID]], summary_fields: Optional[Iterable[str]] = None) -> Select:
+    """Order a list query newest-first and cut out one page.
+    
+    Pages after a cursor walk (created_at, id) on the per-user
+    (user_id, created_at DESC, id DESC) indexes; skip only applies without a
+    cursor. summary_fields limits the load to the columns a summary schema
+    carries, skipping the large text/JSON ones.
+    """
+    if summary_fields is not None:
+        query = query.options(load_only(*[getattr(model, field) for field in summary_fields]))
+    if cursor:
+        query = query.where(tuple_(model.created_at, model.id) < cursor)
+    else:
+        query = query.offset(skip)
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit)
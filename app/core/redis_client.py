@@ -1,14 +1,26 @@
 from redis import asyncio as aioredis
 from app.core.config import settings
+from app.core.metrics import REDIS_COMMAND_DURATION
 import json
+import time
 from typing import Any, Optional
 
+class InstrumentedRedis(aioredis.Redis):
+    """Redis client that times every command, including scripts and streams."""
+    
+    async def execute_command(self, *args, **options):
+        start_time = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_DURATION.labels(str(args[0]).upper()).observe(time.perf_counter() - start_time)
+
 class RedisClient:
     def __init__(self):
         self.redis: Optional[aioredis.Redis] = None
     
     async def connect(self):
-        self.redis = await aioredis.from_url(
+        self.redis = await InstrumentedRedis.from_url(
             settings.REDIS_URL,
             decode_responses=True
         )
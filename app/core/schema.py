@@ -0,0 +1,40 @@
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from typing import Optional
+import os
+
+from app.core.database import get_async_engine
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def script_directory() -> ScriptDirectory:
+    config = Config(os.path.join(PROJECT_ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(PROJECT_ROOT, "migrations"))
+    return ScriptDirectory.from_config(config)
+
+def is_behind(current: Optional[str], script: ScriptDirectory) -> bool:
+    """True if the database is unversioned or at an older revision of this build.
+    
+    A revision this build doesn't know is newer: a replica of the previous
+    release restarting after the next one migrated, which it can still serve.
+    """
+    if current is None:
+        return True
+    head = script.get_current_head()
+    return current != head and current in {revision.revision for revision in script.walk_revisions("base", head)}
+
+async def check_schema():
+    """Refuse to start against a database migrate.py hasn't brought up to date.
+    
+    Columns added by later revisions would otherwise surface as errors on
+    every query that touches them.
+    """
+    async with get_async_engine().connect() as conn:
+        current = await conn.run_sync(lambda sync_conn: MigrationContext.configure(sync_conn).get_current_revision())
+    script = script_directory()
+    if is_behind(current, script):
+        expected = script.get_current_head()
+        raise RuntimeError(
+            f"Database schema is at revision {current or '(unversioned)'} but this build needs {expected}; run `python migrate.py` first"
+        )
@@ -0,0 +1,13 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert to the naive UTC the TIMESTAMP columns hold.
+    
+    asyncpg refuses aware datetimes for TIMESTAMP WITHOUT TIME ZONE, so query
+    bounds like ?start=2024-01-01T00:00:00Z go through here. Naive values are
+    taken to be UTC already.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, JSON, Enum as SQLEnum
+from sqlalchemy import Column, String, Integer, Float, DateTime, Text, JSON, Enum as SQLEnum, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 import uuid
@@ -18,6 +18,9 @@ class AgentType(str, enum.Enum):
 
 class Agent(Base):
     __tablename__ = "agents"
+    __table_args__ = (
+        Index("ix_agents_user_id_created_at", "user_id", text("created_at DESC"), text("id DESC")),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(String(255), nullable=False, index=True)
@@ -27,8 +30,8 @@ class Agent(Base):
     system_prompt = Column(Text, nullable=False)
     capabilities = Column(JSON, default=list)
     model = Column(String(100), default="llama-3.3-70b-versatile")
-    temperature = Column(String(10), default="0.7")
-    max_tokens = Column(String(10), default="2000")
+    temperature = Column(Float, default=0.7)
+    max_tokens = Column(Integer, default=2000)
     agent_metadata = Column(JSON, default=dict)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
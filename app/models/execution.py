@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, JSON, Enum as SQLEnum, ForeignKey
+from sqlalchemy import Column, String, Integer, Numeric, DateTime, Text, JSON, Enum as SQLEnum, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -13,17 +13,37 @@ class ExecutionStatus(str, enum.Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+class ExecutionBatch(Base):
+    __tablename__ = "execution_batches"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(String(255), nullable=False, index=True)
+    agent_id = Column(UUID(as_uuid=True), ForeignKey("agents.id", ondelete="CASCADE"), nullable=False)
+    total = Column(Integer, nullable=False)
+    batch_metadata = Column(JSON, default=dict)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class Execution(Base):
     __tablename__ = "executions"
+    __table_args__ = (
+        Index("ix_executions_user_id_created_at", "user_id", text("created_at DESC"), text("id DESC")),
+        Index("ix_executions_user_id_agent_id_created_at", "user_id", "agent_id", text("created_at DESC"), text("id DESC")),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(String(255), nullable=False, index=True)
     agent_id = Column(UUID(as_uuid=True), ForeignKey("agents.id", ondelete="CASCADE"), nullable=False)
+    batch_id = Column(UUID(as_uuid=True), ForeignKey("execution_batches.id", ondelete="SET NULL"), nullable=True, index=True)
     input_data = Column(Text, nullable=False)
     status = Column(SQLEnum(ExecutionStatus), default=ExecutionStatus.PENDING)
     output = Column(Text, nullable=True)
     error = Column(Text, nullable=True)
     execution_time = Column(String(50), nullable=True)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    latency_ms = Column(Integer, nullable=True)
+    ttft_ms = Column(Integer, nullable=True)
+    cost_usd = Column(Numeric(12, 6), nullable=True)
     execution_metadata = Column(JSON, default=dict)
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
@@ -0,0 +1,65 @@
+from sqlalchemy import Column, String, Integer, DateTime, Text, JSON, Enum as SQLEnum, ForeignKey, Index, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from datetime import datetime
+import uuid
+import enum
+
+from app.core.database import Base
+
+class WorkflowStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class Workflow(Base):
+    __tablename__ = "workflows"
+    __table_args__ = (
+        Index("ix_workflows_user_id_created_at", "user_id", text("created_at DESC"), text("id DESC")),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(String(255), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+    description = Column(Text)
+    # {"steps": [{"name", "agent_id" | "agent_type", "prompt", "depends_on"}]}
+    definition = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class WorkflowRun(Base):
+    __tablename__ = "workflow_runs"
+    __table_args__ = (
+        Index("ix_workflow_runs_workflow_id_created_at", "workflow_id", text("created_at DESC"), text("id DESC")),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    workflow_id = Column(UUID(as_uuid=True), ForeignKey("workflows.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(String(255), nullable=False, index=True)
+    status = Column(SQLEnum(WorkflowStatus), default=WorkflowStatus.PENDING)
+    input_data = Column(Text, nullable=False)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+    
+    workflow = relationship("Workflow", foreign_keys=[workflow_id])
+
+class WorkflowStepRun(Base):
+    """One step's output within a run; completed steps are skipped on resume."""
+    
+    __tablename__ = "workflow_step_runs"
+    __table_args__ = (
+        UniqueConstraint("run_id", "step_name", name="uq_workflow_step_runs_run_id_step_name"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    run_id = Column(UUID(as_uuid=True), ForeignKey("workflow_runs.id", ondelete="CASCADE"), nullable=False)
+    step_name = Column(String(100), nullable=False)
+    status = Column(SQLEnum(WorkflowStatus), default=WorkflowStatus.PENDING)
+    output = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
@@ -4,6 +4,7 @@ from datetime import datetime
 from uuid import UUID
 
 from app.models.agent import AgentType
+from app.core.config import settings
 
 class AgentCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
@@ -25,6 +26,23 @@ class AgentUpdate(BaseModel):
     max_tokens: Optional[int] = None
     agent_metadata: Optional[Dict[str, Any]] = None
 
+class AgentTemplateItem(BaseModel):
+    agent_type: AgentType
+    name: str = Field(..., min_length=1, max_length=255)
+    description: Optional[str] = None
+
+class AgentBulkFromTemplates(BaseModel):
+    items: List[AgentTemplateItem] = Field(..., min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+
+class AgentImportError(BaseModel):
+    line: int
+    errors: List[Dict[str, Any]]
+
+class AgentImportReport(BaseModel):
+    created: int
+    failed: int
+    errors: List[AgentImportError]
+
 class AgentResponse(BaseModel):
     id: UUID
     name: str
@@ -33,11 +51,24 @@ class AgentResponse(BaseModel):
     system_prompt: str
     capabilities: List[str]
     model: str
-    temperature: str
-    max_tokens: str
+    temperature: float
+    max_tokens: int
     agent_metadata: Dict[str, Any]
     created_at: datetime
     updated_at: datetime
     
     class Config:
         from_attributes = True
+
+class AgentSummary(BaseModel):
+    id: UUID
+    name: str
+    agent_type: AgentType
+    description: Optional[str]
+    capabilities: List[str]
+    model: str
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
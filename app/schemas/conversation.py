@@ -0,0 +1,37 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any
+from datetime import datetime
+from uuid import UUID
+
+class ConversationCreate(BaseModel):
+    agent_id: UUID
+    title: Optional[str] = Field(None, max_length=255)
+    conversation_metadata: Optional[Dict[str, Any]] = {}
+
+class ConversationResponse(BaseModel):
+    id: UUID
+    agent_id: UUID
+    title: Optional[str]
+    summary: Optional[str]
+    summarized_through: int
+    message_count: int
+    conversation_metadata: Dict[str, Any]
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class MessageCreate(BaseModel):
+    content: str = Field(..., min_length=1)
+
+class MessageResponse(BaseModel):
+    id: UUID
+    seq: int
+    role: str
+    content: str
+    token_count: int
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
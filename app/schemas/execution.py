@@ -1,9 +1,10 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Annotated
 from datetime import datetime
 from uuid import UUID
 
 from app.models.execution import ExecutionStatus
+from app.core.config import settings
 
 class ExecutionCreate(BaseModel):
     agent_id: UUID
@@ -13,14 +14,61 @@ class ExecutionCreate(BaseModel):
 class ExecutionResponse(BaseModel):
     id: UUID
     agent_id: UUID
+    batch_id: Optional[UUID] = None
     input_data: str
     status: ExecutionStatus
     output: Optional[str]
     error: Optional[str]
     execution_time: Optional[str]
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    latency_ms: Optional[int] = None
+    ttft_ms: Optional[int] = None
+    cost_usd: Optional[float] = None
     execution_metadata: Dict[str, Any]
     created_at: datetime
     completed_at: Optional[datetime]
     
     class Config:
         from_attributes = True
+
+class ExecutionSummary(BaseModel):
+    id: UUID
+    agent_id: UUID
+    batch_id: Optional[UUID] = None
+    status: ExecutionStatus
+    error: Optional[str]
+    execution_time: Optional[str]
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    latency_ms: Optional[int] = None
+    ttft_ms: Optional[int] = None
+    cost_usd: Optional[float] = None
+    created_at: datetime
+    completed_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
+class BatchExecutionCreate(BaseModel):
+    agent_id: UUID
+    inputs: List[Annotated[str, Field(min_length=1)]] = Field(..., min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+    execution_metadata: Optional[Dict[str, Any]] = {}
+
+class BatchExecutionResponse(BaseModel):
+    batch_id: UUID
+    agent_id: UUID
+    total: int
+    execution_ids: List[UUID]
+    created_at: datetime
+
+class BatchProgressResponse(BaseModel):
+    batch_id: UUID
+    agent_id: UUID
+    total: int
+    pending: int
+    running: int
+    completed: int
+    failed: int
+    finished: bool
+    created_at: datetime
@@ -16,9 +16,31 @@ class TaskResponse(BaseModel):
     created_agent_id: Optional[UUID]
     result: Dict[str, Any]
     error: Optional[str]
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    latency_ms: Optional[int] = None
+    ttft_ms: Optional[int] = None
+    cost_usd: Optional[float] = None
     task_metadata: Dict[str, Any]
     created_at: datetime
     updated_at: datetime
     
     class Config:
         from_attributes = True
+
+class TaskSummary(BaseModel):
+    id: UUID
+    description: str
+    status: TaskStatus
+    created_agent_id: Optional[UUID]
+    error: Optional[str]
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    latency_ms: Optional[int] = None
+    ttft_ms: Optional[int] = None
+    cost_usd: Optional[float] = None
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date
+from uuid import UUID
+
+class UsageRow(BaseModel):
+    day: Optional[date] = None
+    agent_id: Optional[UUID] = None
+    requests: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    cost_usd: float
+    avg_latency_ms: Optional[float]
+    avg_ttft_ms: Optional[float]
@@ -0,0 +1,97 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List
+from datetime import datetime
+from uuid import UUID
+
+from app.models.agent import AgentType
+from app.models.workflow import WorkflowStatus
+from app.core.config import settings
+
+class WorkflowStepDefinition(BaseModel):
+    name: str = Field(..., pattern=r"^[A-Za-z0-9_-]{1,100}$")
+    # A stored agent, or an agent built from the template for this type
+    agent_id: Optional[UUID] = None
+    agent_type: Optional[AgentType] = None
+    # {input} is the run's input and {<step name>} a dependency's output;
+    # dependencies not referenced are appended after the prompt
+    prompt: str = "{input}"
+    depends_on: List[str] = []
+    
+    @model_validator(mode="after")
+    def check_agent(self):
+        if (self.agent_id is None) == (self.agent_type is None):
+            raise ValueError("Set exactly one of agent_id or agent_type")
+        return self
+
+class WorkflowCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+    description: Optional[str] = None
+    steps: List[WorkflowStepDefinition] = Field(..., min_length=1, max_length=settings.WORKFLOW_MAX_STEPS)
+    
+    @model_validator(mode="after")
+    def check_graph(self):
+        names = [step.name for step in self.steps]
+        if len(set(names)) != len(names):
+            raise ValueError("Step names must be unique")
+        if "input" in names:
+            raise ValueError("'input' is reserved for the run input")
+        
+        dependencies = {step.name: step.depends_on for step in self.steps}
+        for name, depends_on in dependencies.items():
+            unknown = set(depends_on) - set(names)
+            if unknown:
+                raise ValueError(f"Step {name} depends on unknown steps: {', '.join(sorted(unknown))}")
+        
+        # Kahn's algorithm; anything left over sits on a cycle
+        remaining = {name: set(depends_on) for name, depends_on in dependencies.items()}
+        while True:
+            ready = [name for name, depends_on in remaining.items() if not depends_on]
+            if not ready:
+                break
+            for name in ready:
+                del remaining[name]
+            for depends_on in remaining.values():
+                depends_on.difference_update(ready)
+        if remaining:
+            raise ValueError(f"Steps form a cycle: {', '.join(sorted(remaining))}")
+        return self
+
+class WorkflowResponse(BaseModel):
+    id: UUID
+    name: str
+    description: Optional[str]
+    definition: dict
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class WorkflowRunCreate(BaseModel):
+    input_data: str = Field(..., min_length=1)
+
+class WorkflowStepRunResponse(BaseModel):
+    step_name: str
+    status: WorkflowStatus
+    output: Optional[str]
+    error: Optional[str]
+    prompt_tokens: Optional[int]
+    completion_tokens: Optional[int]
+    started_at: Optional[datetime]
+    completed_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
+class WorkflowRunResponse(BaseModel):
+    id: UUID
+    workflow_id: UUID
+    status: WorkflowStatus
+    input_data: str
+    error: Optional[str]
+    created_at: datetime
+    completed_at: Optional[datetime]
+    steps: List[WorkflowStepRunResponse] = []
+    
+    class Config:
+        from_attributes = True
@@ -1,14 +1,38 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
+from typing import List, Optional, Tuple, Dict, Any, AsyncIterator
 from uuid import UUID
+from datetime import datetime
+import uuid
 
 from app.models.agent import Agent, AgentType
-from app.schemas.agent import AgentCreate, AgentUpdate
+from app.schemas.agent import AgentCreate, AgentUpdate, AgentSummary, AgentTemplateItem
 from app.agents.templates import get_template
+from app.core.config import settings
+from app.core.database import async_session_scope
+from app.core.pagination import paginate
+from app.core.ndjson import iter_lines
+from app.agents.runtime_cache import AgentRuntime, agent_runtime_cache
 
 class AgentService:
     @staticmethod
-    def create_agent(db: Session, agent_data: AgentCreate, user_id: str) -> Agent:
+    def template_values(agent_type: AgentType, name: str, description: Optional[str] = None) -> Dict[str, Any]:
+        template = get_template(agent_type)
+        return {
+            "name": name,
+            "agent_type": agent_type,
+            "description": description or f"Agent created from {agent_type.value} template",
+            "system_prompt": template["system_prompt"],
+            "capabilities": template["capabilities"],
+            "model": "llama-3.3-70b-versatile",
+            "temperature": template["temperature"],
+            "max_tokens": template["max_tokens"],
+            "agent_metadata": {"created_from": "template"}
+        }
+    
+    @staticmethod
+    async def acreate_agent(db: AsyncSession, agent_data: AgentCreate, user_id: str) -> Agent:
         agent = Agent(
             user_id=user_id,
             name=agent_data.name,
@@ -17,74 +41,144 @@ class AgentService:
             system_prompt=agent_data.system_prompt,
             capabilities=agent_data.capabilities or [],
             model=agent_data.model,
-            temperature=str(agent_data.temperature),
-            max_tokens=str(agent_data.max_tokens),
+            temperature=agent_data.temperature,
+            max_tokens=agent_data.max_tokens,
             agent_metadata=agent_data.agent_metadata or {}
         )
         db.add(agent)
-        db.commit()
-        db.refresh(agent)
+        await db.commit()
+        await db.refresh(agent)
         return agent
     
     @staticmethod
-    def create_agent_from_template(db: Session, agent_type: AgentType, name: str, user_id: str, description: Optional[str] = None) -> Agent:
-        template = get_template(agent_type)
-        
-        agent = Agent(
-            user_id=user_id,
-            name=name,
-            agent_type=agent_type,
-            description=description or f"Agent created from {agent_type.value} template",
-            system_prompt=template["system_prompt"],
-            capabilities=template["capabilities"],
-            model="llama-3.3-70b-versatile",
-            temperature=str(template["temperature"]),
-            max_tokens=str(template["max_tokens"]),
-            agent_metadata={"created_from": "template"}
-        )
+    async def acreate_agent_from_template(db: AsyncSession, agent_type: AgentType, name: str, user_id: str, description: Optional[str] = None) -> Agent:
+        agent = Agent(user_id=user_id, **AgentService.template_values(agent_type, name, description))
         db.add(agent)
-        db.commit()
-        db.refresh(agent)
+        await db.commit()
+        await db.refresh(agent)
         return agent
     
     @staticmethod
-    def get_agent(db: Session, agent_id: UUID, user_id: str) -> Optional[Agent]:
-        return db.query(Agent).filter(Agent.id == agent_id, Agent.user_id == user_id).first()
+    def _new_row(user_id: str, values: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        return {"id": uuid.uuid4(), "user_id": user_id, **values, "created_at": now, "updated_at": now}
+    
+    @staticmethod
+    async def acreate_agents_from_templates(db: AsyncSession, items: List[AgentTemplateItem], user_id: str) -> List[Dict[str, Any]]:
+        """Instantiate many template agents in one transaction."""
+        now = datetime.utcnow()
+        rows = [
+            AgentService._new_row(user_id, AgentService.template_values(item.agent_type, item.name, item.description), now)
+            for item in items
+        ]
+        for start in range(0, len(rows), settings.AGENT_IMPORT_CHUNK_SIZE):
+            # executemany; SQLAlchemy folds this into multi-row INSERTs
+            await db.execute(insert(Agent), rows[start:start + settings.AGENT_IMPORT_CHUNK_SIZE])
+        await db.commit()
+        return rows
     
     @staticmethod
-    def get_all_agents(db: Session, user_id: str, skip: int = 0, limit: int = 100, agent_type: Optional[AgentType] = None) -> List[Agent]:
-        query = db.query(Agent).filter(Agent.user_id == user_id)
+    async def aimport_agents(db: AsyncSession, chunks: AsyncIterator[bytes], user_id: str) -> Dict[str, Any]:
+        """Create agents from an NDJSON stream of AgentCreate objects.
+        
+        Lines are validated as they arrive and valid rows are committed every
+        AGENT_IMPORT_CHUNK_SIZE, so the body is never held in memory. Invalid
+        lines are skipped and reported by line number.
+        """
+        report = {"created": 0, "failed": 0, "errors": []}
+        rows = []
+        
+        async def flush():
+            await db.execute(insert(Agent), rows)
+            await db.commit()
+            report["created"] += len(rows)
+            rows.clear()
+        
+        async for line_no, line in iter_lines(chunks, settings.AGENT_IMPORT_MAX_LINE_BYTES):
+            if line is None:
+                errors = [{"loc": [], "msg": f"Line is longer than {settings.AGENT_IMPORT_MAX_LINE_BYTES} bytes"}]
+            else:
+                try:
+                    agent_data = AgentCreate.model_validate_json(line)
+                    errors = None
+                except ValidationError as e:
+                    errors = [{"loc": list(error["loc"]), "msg": error["msg"]} for error in e.errors()]
+            
+            if errors:
+                report["failed"] += 1
+                if len(report["errors"]) < settings.AGENT_IMPORT_MAX_ERRORS:
+                    report["errors"].append({"line": line_no, "errors": errors})
+                continue
+            
+            values = agent_data.model_dump()
+            values["capabilities"] = values["capabilities"] or []
+            values["agent_metadata"] = values["agent_metadata"] or {}
+            rows.append(AgentService._new_row(user_id, values, datetime.utcnow()))
+            if len(rows) >= settings.AGENT_IMPORT_CHUNK_SIZE:
+                await flush()
+        
+        if rows:
+            await flush()
+        return report
+    
+    @staticmethod
+    async def astream_agents(user_id: str, agent_type: Optional[AgentType] = None) -> AsyncIterator[Agent]:
+        """Every agent of a user, oldest first, read through a server-side cursor."""
+        # Own session: a streamed response outlives the request's dependencies
+        async with async_session_scope() as db:
+            query = select(Agent).where(Agent.user_id == user_id)
+            if agent_type:
+                query = query.where(Agent.agent_type == agent_type)
+            query = query.order_by(Agent.created_at, Agent.id).execution_options(yield_per=settings.AGENT_IMPORT_CHUNK_SIZE)
+            result = await db.stream(query)
+            async for agent in result.scalars():
+                yield agent
+    
+    @staticmethod
+    async def aget_agent(db: AsyncSession, agent_id: UUID, user_id: str) -> Optional[Agent]:
+        result = await db.execute(select(Agent).where(Agent.id == agent_id, Agent.user_id == user_id))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def aget_all_agents(db: AsyncSession, user_id: str, skip: int = 0, limit: int = 100, agent_type: Optional[AgentType] = None, cursor: Optional[Tuple[datetime, UUID]] = None, summary: bool = False) -> List[Agent]:
+        query = select(Agent).where(Agent.user_id == user_id)
         if agent_type:
-            query = query.filter(Agent.agent_type == agent_type)
-        return query.order_by(Agent.created_at.desc()).offset(skip).limit(limit).all()
+            query = query.where(Agent.agent_type == agent_type)
+        result = await db.execute(paginate(query, Agent, skip, limit, cursor, AgentSummary.model_fields if summary else None))
+        return list(result.scalars().all())
     
     @staticmethod
-    def update_agent(db: Session, agent_id: UUID, agent_data: AgentUpdate, user_id: str) -> Optional[Agent]:
-        agent = db.query(Agent).filter(Agent.id == agent_id, Agent.user_id == user_id).first()
+    async def aupdate_agent(db: AsyncSession, agent_id: UUID, agent_data: AgentUpdate, user_id: str) -> Optional[Agent]:
+        agent = await AgentService.aget_agent(db, agent_id, user_id)
         if not agent:
             return None
         
         update_data = agent_data.model_dump(exclude_unset=True)
         
-        if "temperature" in update_data:
-            update_data["temperature"] = str(update_data["temperature"])
-        if "max_tokens" in update_data:
-            update_data["max_tokens"] = str(update_data["max_tokens"])
-        
         for key, value in update_data.items():
             setattr(agent, key, value)
         
-        db.commit()
-        db.refresh(agent)
+        await db.commit()
+        await db.refresh(agent)
+        await agent_runtime_cache.invalidate(agent.id, agent.updated_at)
         return agent
     
     @staticmethod
-    def delete_agent(db: Session, agent_id: UUID, user_id: str) -> bool:
-        agent = db.query(Agent).filter(Agent.id == agent_id, Agent.user_id == user_id).first()
+    async def adelete_agent(db: AsyncSession, agent_id: UUID, user_id: str) -> bool:
+        agent = await AgentService.aget_agent(db, agent_id, user_id)
         if not agent:
             return False
-        db.delete(agent)
-        db.commit()
+        await db.delete(agent)
+        await db.commit()
+        await agent_runtime_cache.invalidate(agent_id)
         return True
+    
+    @staticmethod
+    async def aget_runtime(db: AsyncSession, agent_id: UUID) -> Optional[AgentRuntime]:
+        """Prepared spec of an agent, from the runtime cache when it's there."""
+        runtime = agent_runtime_cache.get(agent_id)
+        if runtime:
+            return runtime
+        agent = (await db.execute(select(Agent).where(Agent.id == agent_id))).scalars().first()
+        return agent_runtime_cache.store(agent) if agent else None
 
 agent_service = AgentService()
\ No newline at end of file
@@ -0,0 +1,236 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, AsyncIterator, Tuple
+from uuid import UUID
+from datetime import datetime
+import uuid
+
+from app.models.conversation import Conversation, ConversationMessage
+from app.models.agent import Agent
+from app.schemas.conversation import ConversationCreate
+from app.agents.factory import agent_factory, CompletionUsage
+from app.agents.scheduler import llm_scheduler
+from app.services.agent_service import agent_service
+from app.core.database import async_session_scope
+from app.core.pagination import paginate
+from app.core.config import settings
+from app.core.redis_client import redis_client
+
+# Delete the turn lock only if it is still ours
+RELEASE_TURN_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+def turn_lock_key(conversation_id: UUID) -> str:
+    return f"conversation:{conversation_id}:turn"
+
+class TurnInProgress(Exception):
+    """Another message to the conversation is still being answered."""
+
+def estimate_tokens(text: str) -> int:
+    return llm_scheduler.estimate_tokens(len(text), 0)
+
+class ConversationTurn:
+    """An assistant reply in progress.
+    
+    Iterating tokens relays the reply; once it is exhausted the user message
+    and the reply are stored as messages seq - 1 and seq.
+    """
+    
+    def __init__(self, conversation_id: UUID, seq: int, tokens: AsyncIterator[str]):
+        self.conversation_id = conversation_id
+        self.seq = seq
+        self.tokens = tokens
+
+class ConversationService:
+    @staticmethod
+    async def acreate_conversation(db: AsyncSession, conversation_data: ConversationCreate, user_id: str) -> Conversation:
+        result = await db.execute(select(Agent.id).where(Agent.id == conversation_data.agent_id, Agent.user_id == user_id))
+        if result.first() is None:
+            raise ValueError(f"Agent with id {conversation_data.agent_id} not found")
+        
+        conversation = Conversation(
+            user_id=user_id,
+            agent_id=conversation_data.agent_id,
+            title=conversation_data.title,
+            summarized_through=0,
+            message_count=0,
+            conversation_metadata=conversation_data.conversation_metadata or {}
+        )
+        db.add(conversation)
+        await db.commit()
+        await db.refresh(conversation)
+        return conversation
+    
+    @staticmethod
+    async def aget_conversation(db: AsyncSession, conversation_id: UUID, user_id: str) -> Optional[Conversation]:
+        result = await db.execute(select(Conversation).where(Conversation.id == conversation_id, Conversation.user_id == user_id))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def aget_all_conversations(db: AsyncSession, user_id: str, skip: int = 0, limit: int = 100, agent_id: Optional[UUID] = None, cursor: Optional[Tuple[datetime, UUID]] = None) -> List[Conversation]:
+        query = select(Conversation).where(Conversation.user_id == user_id)
+        if agent_id:
+            query = query.where(Conversation.agent_id == agent_id)
+        result = await db.execute(paginate(query, Conversation, skip, limit, cursor))
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def aget_messages(db: AsyncSession, conversation_id: UUID, user_id: str, after_seq: int = 0, limit: int = 100) -> Optional[List[ConversationMessage]]:
+        if not await ConversationService.aget_conversation(db, conversation_id, user_id):
+            return None
+        result = await db.execute(
+            select(ConversationMessage)
+            .where(ConversationMessage.conversation_id == conversation_id, ConversationMessage.seq > after_seq)
+            .order_by(ConversationMessage.seq)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def adelete_conversation(db: AsyncSession, conversation_id: UUID, user_id: str) -> bool:
+        conversation = await ConversationService.aget_conversation(db, conversation_id, user_id)
+        if not conversation:
+            return False
+        await db.delete(conversation)
+        await db.commit()
+        return True
+    
+    @staticmethod
+    def context_budget(agent: Agent) -> int:
+        return int((agent.agent_metadata or {}).get("context_tokens") or settings.CONVERSATION_CONTEXT_TOKENS)
+    
+    @staticmethod
+    def split_window(history: List[ConversationMessage], fixed_tokens: int, budget: int) -> int:
+        """Index of the first message to keep verbatim; earlier ones get summarized.
+        
+        Nothing is folded while everything fits. Once it doesn't, enough is
+        folded to get under CONVERSATION_SUMMARY_TARGET of the budget, so the
+        summary (and with it the prompt prefix) changes only every few turns.
+        """
+        total = fixed_tokens + sum(message.token_count for message in history)
+        if total <= budget:
+            return 0
+        
+        target = budget * settings.CONVERSATION_SUMMARY_TARGET
+        split = 0
+        while split < len(history) and total > target:
+            total -= history[split].token_count
+            split += 1
+        return split
+    
+    @staticmethod
+    async def _aclaim_turn(conversation_id: UUID) -> Optional[str]:
+        """Take the conversation's turn slot, returning the lock token.
+        
+        Raises TurnInProgress if another turn holds it. Without Redis there is
+        no lock and the unique seq constraint still rejects the later turn.
+        """
+        if not redis_client.redis:
+            return None
+        token = uuid.uuid4().hex
+        if not await redis_client.redis.set(turn_lock_key(conversation_id), token, nx=True, ex=settings.CONVERSATION_TURN_LOCK_TTL):
+            raise TurnInProgress()
+        return token
+    
+    @staticmethod
+    async def _arelease_turn(conversation_id: UUID, token: Optional[str]):
+        if token is None or not redis_client.redis:
+            return
+        try:
+            await redis_client.redis.eval(RELEASE_TURN_SCRIPT, 1, turn_lock_key(conversation_id), token)
+        except Exception:
+            pass
+    
+    @staticmethod
+    async def astart_turn(conversation_id: UUID, user_id: str, content: str) -> Optional[ConversationTurn]:
+        """Send a user message and open the assistant's reply.
+        
+        Only the turns after the rolling summary are sent, so long chats don't
+        resend the whole transcript. Returns None if the conversation doesn't
+        exist and raises TurnInProgress, before any model call, if a reply to
+        the same conversation is still running.
+        """
+        token = await ConversationService._aclaim_turn(conversation_id)
+        try:
+            turn = await ConversationService._aopen_turn(conversation_id, user_id, content, token)
+        except BaseException:
+            await ConversationService._arelease_turn(conversation_id, token)
+            raise
+        if not turn:
+            await ConversationService._arelease_turn(conversation_id, token)
+        return turn
+    
+    @staticmethod
+    async def _aopen_turn(conversation_id: UUID, user_id: str, content: str, lock_token: Optional[str]) -> Optional[ConversationTurn]:
+        async with async_session_scope() as db:
+            conversation = (await db.execute(
+                select(Conversation).where(Conversation.id == conversation_id, Conversation.user_id == user_id)
+            )).scalars().first()
+            if not conversation:
+                return None
+            agent = await agent_service.aget_runtime(db, conversation.agent_id)
+            history = list((await db.execute(
+                select(ConversationMessage)
+                .where(ConversationMessage.conversation_id == conversation_id, ConversationMessage.seq > conversation.summarized_through)
+                .order_by(ConversationMessage.seq)
+            )).scalars().all())
+            summary = conversation.summary
+            next_seq = conversation.message_count + 1
+        
+        user_tokens = estimate_tokens(content)
+        fixed_tokens = estimate_tokens(agent.system_prompt) + estimate_tokens(summary or "") + user_tokens
+        split = ConversationService.split_window(history, fixed_tokens, ConversationService.context_budget(agent))
+        if split:
+            folded, history = history[:split], history[split:]
+            summary = await agent_factory.asummarize_conversation(
+                summary,
+                [{"role": message.role, "content": message.content} for message in folded],
+                user_id
+            )
+            async with async_session_scope() as db:
+                await db.execute(update(Conversation).where(Conversation.id == conversation_id).values(
+                    summary=summary,
+                    summarized_through=folded[-1].seq
+                ))
+        
+        messages = agent_factory._build_conversation_messages(
+            agent,
+            summary,
+            [{"role": message.role, "content": message.content} for message in history],
+            content
+        )
+        usage, stream = await agent_factory.aopen_stream(agent, content, messages)
+        return ConversationTurn(
+            conversation_id,
+            next_seq + 1,
+            ConversationService._relay_and_store(conversation_id, next_seq, content, user_tokens, usage, stream, lock_token)
+        )
+    
+    @staticmethod
+    async def _relay_and_store(conversation_id: UUID, seq: int, content: str, user_tokens: int, usage: CompletionUsage, stream: AsyncIterator[str], lock_token: Optional[str]) -> AsyncIterator[str]:
+        try:
+            parts = []
+            async for token in stream:
+                parts.append(token)
+                yield token
+            reply = "".join(parts)
+            
+            # The unique (conversation_id, seq) constraint still rejects a
+            # concurrent turn if the lock expired or Redis was unavailable
+            async with async_session_scope() as db:
+                db.add_all([
+                    ConversationMessage(conversation_id=conversation_id, seq=seq, role="user", content=content, token_count=user_tokens),
+                    ConversationMessage(conversation_id=conversation_id, seq=seq + 1, role="assistant", content=reply, token_count=usage.completion_tokens or estimate_tokens(reply))
+                ])
+                await db.execute(update(Conversation).where(Conversation.id == conversation_id).values(
+                    message_count=seq + 1,
+                    updated_at=datetime.utcnow()
+                ))
+        finally:
+            await ConversationService._arelease_turn(conversation_id, lock_token)
+
+conversation_service = ConversationService()
@@ -1,20 +1,39 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import select, update, insert, func, Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator
 from uuid import UUID
 from datetime import datetime
+from contextlib import AsyncExitStack
 import time
+import uuid
+import asyncio
 
-from app.models.execution import Execution, ExecutionStatus
+from app.models.execution import Execution, ExecutionBatch, ExecutionStatus
 from app.models.agent import Agent
-from app.schemas.execution import ExecutionCreate
-from app.agents.factory import agent_factory
+from app.schemas.execution import ExecutionCreate, ExecutionResponse, ExecutionSummary, BatchExecutionCreate
+from app.agents.factory import agent_factory, CompletionUsage
+from app.agents.response_cache import response_cache
+from app.agents.runtime_cache import AgentRuntime
+from app.services.agent_service import agent_service
 from app.core.redis_client import redis_client
+from app.core.database import async_session_scope
+from app.core.pagination import paginate
+from app.core.config import settings
+from app.core.timestamps import naive_utc
+from app.core.metrics import JOB_DURATION
+from app.core.event_stream import execution_events
+
+# Exports carry the same columns as the API's execution objects
+EXPORT_FIELDS = list(ExecutionResponse.model_fields)
+
+def execution_cache_key(execution_id: UUID) -> str:
+    return f"execution:{execution_id}"
 
 class ExecutionService:
     @staticmethod
-    def create_execution(db: Session, execution_data: ExecutionCreate, user_id: str) -> Execution:
-        agent = db.query(Agent).filter(Agent.id == execution_data.agent_id, Agent.user_id == user_id).first()
-        if not agent:
+    async def acreate_execution(db: AsyncSession, execution_data: ExecutionCreate, user_id: str) -> Execution:
+        result = await db.execute(select(Agent.id).where(Agent.id == execution_data.agent_id, Agent.user_id == user_id))
+        if result.first() is None:
             raise ValueError(f"Agent with id {execution_data.agent_id} not found")
         
         execution = Execution(
@@ -25,70 +44,281 @@ class ExecutionService:
             execution_metadata=execution_data.execution_metadata
         )
         db.add(execution)
-        db.commit()
-        db.refresh(execution)
+        await db.commit()
+        await db.refresh(execution)
         return execution
     
     @staticmethod
-    async def process_execution(db: Session, execution_id: UUID):
-        execution = db.query(Execution).filter(Execution.id == execution_id).first()
-        if not execution:
-            return
+    async def acreate_batch(db: AsyncSession, batch_data: BatchExecutionCreate, user_id: str) -> Tuple[ExecutionBatch, List[UUID]]:
+        result = await db.execute(select(Agent.id).where(Agent.id == batch_data.agent_id, Agent.user_id == user_id))
+        if result.first() is None:
+            raise ValueError(f"Agent with id {batch_data.agent_id} not found")
+        
+        batch = ExecutionBatch(
+            id=uuid.uuid4(),
+            user_id=user_id,
+            agent_id=batch_data.agent_id,
+            total=len(batch_data.inputs),
+            batch_metadata=batch_data.execution_metadata or {},
+            created_at=datetime.utcnow()
+        )
+        db.add(batch)
+        await db.flush()
+        
+        execution_metadata = {**(batch_data.execution_metadata or {}), "batch_id": str(batch.id)}
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "agent_id": batch_data.agent_id,
+                "batch_id": batch.id,
+                "input_data": input_data,
+                "status": ExecutionStatus.PENDING,
+                "execution_metadata": execution_metadata,
+                "created_at": batch.created_at
+            }
+            for input_data in batch_data.inputs
+        ]
+        # executemany; SQLAlchemy folds this into multi-row INSERTs
+        await db.execute(insert(Execution), rows)
+        await db.commit()
+        return batch, [row["id"] for row in rows]
+    
+    @staticmethod
+    async def process_batch(execution_ids: List[UUID], concurrency: int = settings.BATCH_CONCURRENCY):
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run(execution_id: UUID):
+            async with semaphore:
+                await ExecutionService.process_execution(execution_id)
+        
+        await asyncio.gather(*(run(execution_id) for execution_id in execution_ids))
+    
+    @staticmethod
+    async def aget_batch_progress(db: AsyncSession, batch_id: UUID, user_id: str) -> Optional[Dict[str, Any]]:
+        batch = (await db.execute(select(ExecutionBatch).where(ExecutionBatch.id == batch_id, ExecutionBatch.user_id == user_id))).scalars().first()
+        if not batch:
+            return None
+        
+        counts = dict((await db.execute(
+            select(Execution.status, func.count()).where(Execution.batch_id == batch_id).group_by(Execution.status)
+        )).all())
+        progress = {status.value: counts.get(status, 0) for status in ExecutionStatus}
+        return {
+            "batch_id": batch.id,
+            "agent_id": batch.agent_id,
+            "total": batch.total,
+            **progress,
+            "finished": progress["completed"] + progress["failed"] >= batch.total,
+            "created_at": batch.created_at
+        }
+    
+    @staticmethod
+    async def process_execution(execution_id: UUID, takeover: bool = False):
+        """Run a pending execution.
+        
+        The row is claimed with a conditional update, so a duplicate delivery
+        finds it taken and returns without calling the model. takeover also
+        claims a RUNNING row, for a redelivered job whose worker died.
+        """
+        job_start = time.monotonic()
+        claimable = [ExecutionStatus.PENDING, ExecutionStatus.RUNNING] if takeover else [ExecutionStatus.PENDING]
+        # Each state transition gets its own session so no pooled connection
+        # is held while waiting on the model
+        async with async_session_scope() as db:
+            claimed = (await db.execute(
+                update(Execution)
+                .where(Execution.id == execution_id, Execution.status.in_(claimable))
+                .values(status=ExecutionStatus.RUNNING)
+                .returning(Execution.agent_id, Execution.input_data, Execution.execution_metadata)
+            )).first()
+            if not claimed:
+                return
+            agent = await agent_service.aget_runtime(db, claimed.agent_id)
+            input_data = claimed.input_data
+            execution_metadata = dict(claimed.execution_metadata or {})
+        
+        await ExecutionService.invalidate_execution_cache(execution_id)
         
         try:
-            execution.status = ExecutionStatus.RUNNING
-            db.commit()
-            
             await redis_client.set(f"execution:{execution_id}:status", "running", expire=3600)
+            if takeover:
+                await execution_events.reset(execution_id)
+            await execution_events.publish(execution_id, "status", status=ExecutionStatus.RUNNING.value)
             
-            agent = db.query(Agent).filter(Agent.id == execution.agent_id).first()
             if not agent:
                 raise ValueError(f"Agent not found")
             
             start_time = time.time()
             
-            output = agent_factory.execute_with_agent(agent, execution.input_data)
+            use_cache = response_cache.is_enabled_for(agent)
+            output = await response_cache.get(agent, input_data) if use_cache else None
+            if output is not None:
+                # Nothing was billed for a cached answer
+                usage = CompletionUsage()
+                execution_metadata["response_cache"] = "hit"
+                await execution_events.publish(execution_id, "token", content=output)
+            else:
+                usage, output = await ExecutionService._stream_output(execution_id, agent, input_data)
+                execution_metadata["served_model"] = usage.model
+                if use_cache:
+                    execution_metadata["response_cache"] = "miss"
+                    # The key names agent.model; a fallback's answer would pass for it
+                    if usage.model == agent.model:
+                        await response_cache.set(agent, input_data, output)
             
             end_time = time.time()
             execution_time = f"{end_time - start_time:.2f}s"
             
-            execution.status = ExecutionStatus.COMPLETED
-            execution.output = output
-            execution.execution_time = execution_time
-            execution.completed_at = datetime.utcnow()
-            
-            db.commit()
+            async with async_session_scope() as db:
+                await db.execute(update(Execution).where(Execution.id == execution_id).values(
+                    status=ExecutionStatus.COMPLETED,
+                    output=output,
+                    execution_time=execution_time,
+                    prompt_tokens=usage.prompt_tokens,
+                    completion_tokens=usage.completion_tokens,
+                    latency_ms=int((end_time - start_time) * 1000),
+                    ttft_ms=usage.ttft_ms,
+                    cost_usd=usage.cost,
+                    execution_metadata=execution_metadata,
+                    completed_at=datetime.utcnow()
+                ))
             
+            await ExecutionService.invalidate_execution_cache(execution_id)
+            JOB_DURATION.labels("execution", "completed").observe(time.monotonic() - job_start)
             await redis_client.set(f"execution:{execution_id}:status", "completed", expire=3600)
             await redis_client.set(f"execution:{execution_id}:output", output, expire=3600)
+            await execution_events.publish(execution_id, "done", status=ExecutionStatus.COMPLETED.value)
             
         except Exception as e:
-            execution.status = ExecutionStatus.FAILED
-            execution.error = str(e)
-            execution.completed_at = datetime.utcnow()
-            db.commit()
+            async with async_session_scope() as db:
+                await db.execute(update(Execution).where(Execution.id == execution_id).values(
+                    status=ExecutionStatus.FAILED,
+                    error=str(e),
+                    completed_at=datetime.utcnow()
+                ))
             
+            await ExecutionService.invalidate_execution_cache(execution_id)
+            JOB_DURATION.labels("execution", "failed").observe(time.monotonic() - job_start)
             await redis_client.set(f"execution:{execution_id}:status", "failed", expire=3600)
             await redis_client.set(f"execution:{execution_id}:error", str(e), expire=3600)
+            await execution_events.publish(execution_id, "error", status=ExecutionStatus.FAILED.value, error=str(e))
     
     @staticmethod
-    def get_execution(db: Session, execution_id: UUID, user_id: str) -> Optional[Execution]:
-        return db.query(Execution).filter(Execution.id == execution_id, Execution.user_id == user_id).first()
+    async def _stream_output(execution_id: UUID, agent: AgentRuntime, input_data: str) -> Tuple[CompletionUsage, str]:
+        """Generate the completion, relaying tokens to stream subscribers as they arrive.
+        
+        Returns the usage of the request (including the model that served it)
+        and the full output.
+        """
+        parts = []
+        pending = []
+        last_flush = time.monotonic()
+        
+        usage, stream = await agent_factory.aopen_stream(agent, input_data, agent.messages(input_data))
+        async for token in stream:
+            parts.append(token)
+            pending.append(token)
+            if time.monotonic() - last_flush >= settings.STREAM_FLUSH_INTERVAL:
+                await execution_events.publish(execution_id, "token", content="".join(pending))
+                pending.clear()
+                last_flush = time.monotonic()
+        
+        if pending:
+            await execution_events.publish(execution_id, "token", content="".join(pending))
+        
+        return usage, "".join(parts)
+    
+    @staticmethod
+    async def aget_execution(db: AsyncSession, execution_id: UUID, user_id: str) -> Optional[Execution]:
+        result = await db.execute(select(Execution).where(Execution.id == execution_id, Execution.user_id == user_id))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def aget_execution_cached(db: AsyncSession, execution_id: UUID, user_id: str) -> Optional[Dict[str, Any]]:
+        """Serve an execution from Redis when possible, falling back to the DB."""
+        key = execution_cache_key(execution_id)
+        try:
+            cached = await redis_client.get(key)
+        except Exception:
+            cached = None
+        if isinstance(cached, dict):
+            return cached if cached.get("user_id") == user_id else None
+        
+        execution = await ExecutionService.aget_execution(db, execution_id, user_id)
+        if not execution:
+            return None
+        
+        data = ExecutionResponse.model_validate(execution).model_dump(mode="json")
+        data["user_id"] = execution.user_id
+        terminal = execution.status in (ExecutionStatus.COMPLETED, ExecutionStatus.FAILED)
+        try:
+            await redis_client.set(key, data, expire=settings.STATUS_CACHE_TTL if terminal else settings.STATUS_CACHE_ACTIVE_TTL)
+        except Exception:
+            pass
+        return data
     
     @staticmethod
-    def get_all_executions(db: Session, user_id: str, skip: int = 0, limit: int = 100, agent_id: Optional[UUID] = None) -> List[Execution]:
-        query = db.query(Execution).filter(Execution.user_id == user_id)
+    async def invalidate_execution_cache(execution_id: UUID, include_status: bool = False):
+        keys = [execution_cache_key(execution_id)]
+        if include_status:
+            keys += [f"execution:{execution_id}:{suffix}" for suffix in ("status", "output", "error")]
+        try:
+            for key in keys:
+                await redis_client.delete(key)
+        except Exception:
+            pass
+    
+    @staticmethod
+    async def aget_all_executions(db: AsyncSession, user_id: str, skip: int = 0, limit: int = 100, agent_id: Optional[UUID] = None, cursor: Optional[Tuple[datetime, UUID]] = None, summary: bool = False) -> List[Execution]:
+        query = select(Execution).where(Execution.user_id == user_id)
+        if agent_id:
+            query = query.where(Execution.agent_id == agent_id)
+        result = await db.execute(paginate(query, Execution, skip, limit, cursor, ExecutionSummary.model_fields if summary else None))
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def aopen_export(user_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None, agent_id: Optional[UUID] = None) -> AsyncIterator[Row]:
+        """EXPORT_FIELDS of a user's executions, oldest first, read through a server-side cursor.
+        
+        The query is running by the time this returns, so a failure raises
+        here rather than after the response has started. Rows are plain
+        tuples rather than ORM objects, and only EXPORT_FETCH_SIZE of them are
+        held at a time.
+        """
+        query = select(*[getattr(Execution, field) for field in EXPORT_FIELDS]).where(Execution.user_id == user_id)
         if agent_id:
-            query = query.filter(Execution.agent_id == agent_id)
-        return query.order_by(Execution.created_at.desc()).offset(skip).limit(limit).all()
+            query = query.where(Execution.agent_id == agent_id)
+        if start:
+            query = query.where(Execution.created_at >= naive_utc(start))
+        if end:
+            query = query.where(Execution.created_at < naive_utc(end))
+        query = query.order_by(Execution.created_at, Execution.id).execution_options(yield_per=settings.EXPORT_FETCH_SIZE)
+        
+        # Own session: a streamed response outlives the request's dependencies
+        stack = AsyncExitStack()
+        db = await stack.enter_async_context(async_session_scope())
+        try:
+            result = await db.stream(query)
+        except BaseException:
+            await stack.aclose()
+            raise
+        
+        async def rows() -> AsyncIterator[Row]:
+            async with stack:
+                async for row in result:
+                    yield row
+        return rows()
     
     @staticmethod
-    def delete_execution(db: Session, execution_id: UUID, user_id: str) -> bool:
-        execution = db.query(Execution).filter(Execution.id == execution_id, Execution.user_id == user_id).first()
+    async def adelete_execution(db: AsyncSession, execution_id: UUID, user_id: str) -> bool:
+        execution = await ExecutionService.aget_execution(db, execution_id, user_id)
         if not execution:
             return False
-        db.delete(execution)
-        db.commit()
+        await db.delete(execution)
+        await db.commit()
+        await ExecutionService.invalidate_execution_cache(execution_id, include_status=True)
+        await execution_events.delete(execution_id)
         return True
 
-execution_service = ExecutionService()
\ No newline at end of file
+execution_service = ExecutionService()
@@ -1,17 +1,28 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
 from datetime import datetime
+import time
+import uuid
+import asyncio
 
 from app.models.task import Task, TaskStatus
 from app.models.agent import Agent
-from app.schemas.task import TaskCreate
-from app.agents.factory import agent_factory
+from app.schemas.task import TaskCreate, TaskResponse, TaskSummary
+from app.agents.factory import agent_factory, CompletionUsage
 from app.core.redis_client import redis_client
+from app.core.database import async_session_scope
+from app.core.pagination import paginate
+from app.core.config import settings
+from app.core.metrics import JOB_DURATION
+
+def task_cache_key(task_id: UUID) -> str:
+    return f"task:{task_id}"
 
 class TaskService:
     @staticmethod
-    def create_task(db: Session, task_data: TaskCreate, user_id: str) -> Task:
+    async def acreate_task(db: AsyncSession, task_data: TaskCreate, user_id: str) -> Task:
         task = Task(
             user_id=user_id,
             description=task_data.description,
@@ -19,85 +30,174 @@ class TaskService:
             task_metadata=task_data.task_metadata
         )
         db.add(task)
-        db.commit()
-        db.refresh(task)
+        await db.commit()
+        await db.refresh(task)
         return task
     
     @staticmethod
-    async def process_task(db: Session, task_id: UUID):
-        task = db.query(Task).filter(Task.id == task_id).first()
-        if not task:
-            return
+    async def process_task(task_id: UUID, takeover: bool = False):
+        """Classify and answer a pending task; claimed like process_execution."""
+        job_start = time.monotonic()
+        claimable = [TaskStatus.PENDING, TaskStatus.PROCESSING] if takeover else [TaskStatus.PENDING]
+        # Each state transition gets its own session so no pooled connection
+        # is held while waiting on the model
+        async with async_session_scope() as db:
+            claimed = (await db.execute(
+                update(Task)
+                .where(Task.id == task_id, Task.status.in_(claimable))
+                .values(status=TaskStatus.PROCESSING)
+                .returning(Task.description, Task.user_id, Task.task_metadata)
+            )).first()
+            if not claimed:
+                return
+            description = claimed.description
+            user_id = claimed.user_id
+            fused = settings.TASK_PIPELINE_FUSED or bool((claimed.task_metadata or {}).get("fused"))
+        
+        await TaskService.invalidate_task_cache(task_id)
         
         try:
-            task.status = TaskStatus.PROCESSING
-            db.commit()
-            
             await redis_client.set(f"task:{task_id}:status", "processing", expire=3600)
             
-            agent_config = agent_factory.create_agent_config(task.description)
+            start_time = time.monotonic()
+            usage = CompletionUsage()
+            result_output = None
+            if fused:
+                agent_config, result_output = await agent_factory.aresolve_fused(description, user_id, usage)
+            else:
+                agent_config = await agent_factory.aresolve_agent_config(description, user_id, usage)
             
-            agent_data = agent_factory.build_agent_from_config(agent_config, task.description)
+            agent_data = agent_factory.build_agent_from_config(agent_config, description)
             
+            now = datetime.utcnow()
             agent = Agent(
-                user_id=task.user_id,
+                id=uuid.uuid4(),
+                user_id=user_id,
                 name=agent_data["name"],
                 agent_type=agent_data["agent_type"],
                 description=agent_data["description"],
                 system_prompt=agent_data["system_prompt"],
                 capabilities=agent_data["capabilities"],
                 model=agent_data["model"],
-                temperature=str(agent_data["temperature"]),
-                max_tokens=str(agent_data["max_tokens"]),
-                agent_metadata=agent_data["agent_metadata"]
+                temperature=agent_data["temperature"],
+                max_tokens=agent_data["max_tokens"],
+                agent_metadata=agent_data["agent_metadata"],
+                created_at=now,
+                updated_at=now
             )
             
-            db.add(agent)
-            db.commit()
-            db.refresh(agent)
-            
-            result_output = agent_factory.execute_with_agent(agent, task.description)
+            # The id is assigned up front, so the agent row can be written
+            # while the model is still answering
+            persist = asyncio.create_task(TaskService._persist_agent(task_id, agent))
+            if result_output is None:
+                try:
+                    result_output, execution_usage = await agent_factory.aexecute_with_usage(agent, description)
+                    usage.merge(execution_usage)
+                except Exception:
+                    await asyncio.gather(persist, return_exceptions=True)
+                    raise
+            await persist
             
-            task.created_agent_id = agent.id
-            task.status = TaskStatus.COMPLETED
-            task.result = {
+            result = {
                 "agent_id": str(agent.id),
                 "agent_name": agent.name,
                 "agent_type": agent.agent_type.value,
                 "output": result_output,
                 "config": agent_config
             }
-            task.updated_at = datetime.utcnow()
             
-            db.commit()
+            async with async_session_scope() as db:
+                await db.execute(update(Task).where(Task.id == task_id).values(
+                    status=TaskStatus.COMPLETED,
+                    result=result,
+                    prompt_tokens=usage.prompt_tokens,
+                    completion_tokens=usage.completion_tokens,
+                    latency_ms=int((time.monotonic() - start_time) * 1000),
+                    ttft_ms=usage.ttft_ms,
+                    cost_usd=usage.cost,
+                    updated_at=datetime.utcnow()
+                ))
             
+            await TaskService.invalidate_task_cache(task_id)
+            JOB_DURATION.labels("task", "completed").observe(time.monotonic() - job_start)
             await redis_client.set(f"task:{task_id}:status", "completed", expire=3600)
-            await redis_client.set(f"task:{task_id}:result", task.result, expire=3600)
+            await redis_client.set(f"task:{task_id}:result", result, expire=3600)
             
         except Exception as e:
-            task.status = TaskStatus.FAILED
-            task.error = str(e)
-            task.updated_at = datetime.utcnow()
-            db.commit()
+            async with async_session_scope() as db:
+                await db.execute(update(Task).where(Task.id == task_id).values(
+                    status=TaskStatus.FAILED,
+                    error=str(e),
+                    updated_at=datetime.utcnow()
+                ))
             
+            await TaskService.invalidate_task_cache(task_id)
+            JOB_DURATION.labels("task", "failed").observe(time.monotonic() - job_start)
             await redis_client.set(f"task:{task_id}:status", "failed", expire=3600)
             await redis_client.set(f"task:{task_id}:error", str(e), expire=3600)
     
     @staticmethod
-    def get_task(db: Session, task_id: UUID, user_id: str) -> Optional[Task]:
-        return db.query(Task).filter(Task.id == task_id, Task.user_id == user_id).first()
+    async def _persist_agent(task_id: UUID, agent: Agent):
+        async with async_session_scope() as db:
+            db.add(agent)
+            await db.flush()
+            await db.execute(update(Task).where(Task.id == task_id).values(created_agent_id=agent.id))
+        await TaskService.invalidate_task_cache(task_id)
+    
+    @staticmethod
+    async def aget_task(db: AsyncSession, task_id: UUID, user_id: str) -> Optional[Task]:
+        result = await db.execute(select(Task).where(Task.id == task_id, Task.user_id == user_id))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def aget_task_cached(db: AsyncSession, task_id: UUID, user_id: str) -> Optional[Dict[str, Any]]:
+        """Serve a task from Redis when possible, falling back to the DB."""
+        key = task_cache_key(task_id)
+        try:
+            cached = await redis_client.get(key)
+        except Exception:
+            cached = None
+        if isinstance(cached, dict):
+            return cached if cached.get("user_id") == user_id else None
+        
+        task = await TaskService.aget_task(db, task_id, user_id)
+        if not task:
+            return None
+        
+        data = TaskResponse.model_validate(task).model_dump(mode="json")
+        data["user_id"] = task.user_id
+        terminal = task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED)
+        try:
+            await redis_client.set(key, data, expire=settings.STATUS_CACHE_TTL if terminal else settings.STATUS_CACHE_ACTIVE_TTL)
+        except Exception:
+            pass
+        return data
+    
+    @staticmethod
+    async def invalidate_task_cache(task_id: UUID, include_status: bool = False):
+        keys = [task_cache_key(task_id)]
+        if include_status:
+            keys += [f"task:{task_id}:{suffix}" for suffix in ("status", "result", "error")]
+        try:
+            for key in keys:
+                await redis_client.delete(key)
+        except Exception:
+            pass
     
     @staticmethod
-    def get_all_tasks(db: Session, user_id: str, skip: int = 0, limit: int = 100) -> List[Task]:
-        return db.query(Task).filter(Task.user_id == user_id).order_by(Task.created_at.desc()).offset(skip).limit(limit).all()
+    async def aget_all_tasks(db: AsyncSession, user_id: str, skip: int = 0, limit: int = 100, cursor: Optional[Tuple[datetime, UUID]] = None, summary: bool = False) -> List[Task]:
+        query = select(Task).where(Task.user_id == user_id)
+        result = await db.execute(paginate(query, Task, skip, limit, cursor, TaskSummary.model_fields if summary else None))
+        return list(result.scalars().all())
     
     @staticmethod
-    def delete_task(db: Session, task_id: UUID, user_id: str) -> bool:
-        task = db.query(Task).filter(Task.id == task_id, Task.user_id == user_id).first()
+    async def adelete_task(db: AsyncSession, task_id: UUID, user_id: str) -> bool:
+        task = await TaskService.aget_task(db, task_id, user_id)
         if not task:
             return False
-        db.delete(task)
-        db.commit()
+        await db.delete(task)
+        await db.commit()
+        await TaskService.invalidate_task_cache(task_id, include_status=True)
         return True
 
-task_service = TaskService()
\ No newline at end of file
+task_service = TaskService()
@@ -0,0 +1,55 @@
+from sqlalchemy import select, func, cast, Date
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Dict, Any
+from uuid import UUID
+from datetime import datetime
+
+from app.models.execution import Execution
+from app.models.task import Task
+from app.core.timestamps import naive_utc
+
+class UsageService:
+    @staticmethod
+    async def _aggregate(db: AsyncSession, model, agent_column, user_id: str, group_by: List[str], start: Optional[datetime], end: Optional[datetime], agent_id: Optional[UUID]) -> List[Dict[str, Any]]:
+        # Aggregated in the database so only one row per group comes back
+        keys = []
+        if "day" in group_by:
+            keys.append(cast(model.created_at, Date).label("day"))
+        if "agent" in group_by:
+            keys.append(agent_column.label("agent_id"))
+        
+        prompt_tokens = func.coalesce(func.sum(model.prompt_tokens), 0)
+        completion_tokens = func.coalesce(func.sum(model.completion_tokens), 0)
+        query = select(
+            *keys,
+            func.count().label("requests"),
+            prompt_tokens.label("prompt_tokens"),
+            completion_tokens.label("completion_tokens"),
+            (prompt_tokens + completion_tokens).label("total_tokens"),
+            func.coalesce(func.sum(model.cost_usd), 0).label("cost_usd"),
+            func.avg(model.latency_ms).label("avg_latency_ms"),
+            func.avg(model.ttft_ms).label("avg_ttft_ms")
+        ).where(model.user_id == user_id)
+        
+        if start:
+            query = query.where(model.created_at >= naive_utc(start))
+        if end:
+            query = query.where(model.created_at < naive_utc(end))
+        if agent_id:
+            query = query.where(agent_column == agent_id)
+        if keys:
+            query = query.group_by(*keys).order_by(*keys)
+        
+        result = await db.execute(query)
+        return [dict(row._mapping) for row in result]
+    
+    @staticmethod
+    async def aget_execution_usage(db: AsyncSession, user_id: str, group_by: List[str], start: Optional[datetime] = None, end: Optional[datetime] = None, agent_id: Optional[UUID] = None) -> List[Dict[str, Any]]:
+        return await UsageService._aggregate(db, Execution, Execution.agent_id, user_id, group_by, start, end, agent_id)
+    
+    @staticmethod
+    async def aget_task_usage(db: AsyncSession, user_id: str, group_by: List[str], start: Optional[datetime] = None, end: Optional[datetime] = None, agent_id: Optional[UUID] = None) -> List[Dict[str, Any]]:
+        # A task's agent is the one it created
+        return await UsageService._aggregate(db, Task, Task.created_agent_id, user_id, group_by, start, end, agent_id)
+
+usage_service = UsageService()
@@ -0,0 +1,200 @@
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Dict, Any, Tuple
+from uuid import UUID
+from datetime import datetime
+import time
+
+from app.models.workflow import Workflow, WorkflowRun, WorkflowStepRun, WorkflowStatus
+from app.models.agent import Agent
+from app.schemas.workflow import WorkflowCreate, WorkflowRunCreate
+from app.agents.factory import agent_factory
+from app.agents.workflow import build_workflow_graph, render_prompt, template_agent
+from app.core.database import async_session_scope
+from app.core.pagination import paginate
+from app.core.metrics import JOB_DURATION
+
+class WorkflowService:
+    @staticmethod
+    async def acreate_workflow(db: AsyncSession, workflow_data: WorkflowCreate, user_id: str) -> Workflow:
+        agent_ids = {step.agent_id for step in workflow_data.steps if step.agent_id}
+        if agent_ids:
+            result = await db.execute(select(Agent.id).where(Agent.id.in_(agent_ids), Agent.user_id == user_id))
+            missing = agent_ids - set(result.scalars().all())
+            if missing:
+                raise ValueError(f"Agents not found: {', '.join(sorted(str(agent_id) for agent_id in missing))}")
+        
+        workflow = Workflow(
+            user_id=user_id,
+            name=workflow_data.name,
+            description=workflow_data.description,
+            definition={"steps": [step.model_dump(mode="json") for step in workflow_data.steps]}
+        )
+        db.add(workflow)
+        await db.commit()
+        await db.refresh(workflow)
+        return workflow
+    
+    @staticmethod
+    async def aget_workflow(db: AsyncSession, workflow_id: UUID, user_id: str) -> Optional[Workflow]:
+        result = await db.execute(select(Workflow).where(Workflow.id == workflow_id, Workflow.user_id == user_id))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def aget_all_workflows(db: AsyncSession, user_id: str, skip: int = 0, limit: int = 100, cursor: Optional[Tuple[datetime, UUID]] = None) -> List[Workflow]:
+        query = select(Workflow).where(Workflow.user_id == user_id)
+        result = await db.execute(paginate(query, Workflow, skip, limit, cursor))
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def adelete_workflow(db: AsyncSession, workflow_id: UUID, user_id: str) -> bool:
+        workflow = await WorkflowService.aget_workflow(db, workflow_id, user_id)
+        if not workflow:
+            return False
+        await db.delete(workflow)
+        await db.commit()
+        return True
+    
+    @staticmethod
+    async def acreate_run(db: AsyncSession, workflow_id: UUID, run_data: WorkflowRunCreate, user_id: str) -> Optional[WorkflowRun]:
+        if not await WorkflowService.aget_workflow(db, workflow_id, user_id):
+            return None
+        run = WorkflowRun(
+            workflow_id=workflow_id,
+            user_id=user_id,
+            status=WorkflowStatus.PENDING,
+            input_data=run_data.input_data
+        )
+        db.add(run)
+        await db.commit()
+        await db.refresh(run)
+        return run
+    
+    @staticmethod
+    async def aget_run(db: AsyncSession, run_id: UUID, user_id: str) -> Optional[Dict[str, Any]]:
+        run = (await db.execute(select(WorkflowRun).where(WorkflowRun.id == run_id, WorkflowRun.user_id == user_id))).scalars().first()
+        if not run:
+            return None
+        steps = (await db.execute(
+            select(WorkflowStepRun).where(WorkflowStepRun.run_id == run_id).order_by(WorkflowStepRun.started_at)
+        )).scalars().all()
+        return {
+            "id": run.id,
+            "workflow_id": run.workflow_id,
+            "status": run.status,
+            "input_data": run.input_data,
+            "error": run.error,
+            "created_at": run.created_at,
+            "completed_at": run.completed_at,
+            "steps": list(steps)
+        }
+    
+    @staticmethod
+    async def aget_runs(db: AsyncSession, workflow_id: UUID, user_id: str, skip: int = 0, limit: int = 100) -> List[WorkflowRun]:
+        result = await db.execute(
+            select(WorkflowRun)
+            .where(WorkflowRun.workflow_id == workflow_id, WorkflowRun.user_id == user_id)
+            .order_by(WorkflowRun.created_at.desc(), WorkflowRun.id.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def process_run(run_id: UUID, takeover: bool = False):
+        """Run (or resume) a workflow run; steps that already completed are reused.
+        
+        The run is claimed like process_execution: only a PENDING run, or with
+        takeover (a redelivered job whose worker died) a RUNNING one, so two
+        workers never execute the same steps.
+        """
+        job_start = time.monotonic()
+        claimable = [WorkflowStatus.PENDING, WorkflowStatus.RUNNING] if takeover else [WorkflowStatus.PENDING]
+        async with async_session_scope() as db:
+            run = (await db.execute(
+                update(WorkflowRun)
+                .where(WorkflowRun.id == run_id, WorkflowRun.status.in_(claimable))
+                .values(status=WorkflowStatus.RUNNING)
+                .returning(WorkflowRun.workflow_id, WorkflowRun.user_id, WorkflowRun.input_data)
+            )).first()
+            if not run:
+                return
+            user_id = run.user_id
+            input_data = run.input_data
+            workflow = (await db.execute(
+                select(Workflow).where(Workflow.id == run.workflow_id, Workflow.user_id == user_id)
+            )).scalars().first()
+            steps = workflow.definition["steps"] if workflow else []
+            agent_ids = {UUID(step["agent_id"]) for step in steps if step.get("agent_id")}
+            agents = {}
+            if agent_ids:
+                # Ownership is re-checked at run time, not only when the workflow was saved
+                agents = {agent.id: agent for agent in (await db.execute(
+                    select(Agent).where(Agent.id.in_(agent_ids), Agent.user_id == user_id)
+                )).scalars().all()}
+            completed = dict((await db.execute(
+                select(WorkflowStepRun.step_name, WorkflowStepRun.output)
+                .where(WorkflowStepRun.run_id == run_id, WorkflowStepRun.status == WorkflowStatus.COMPLETED)
+            )).all())
+        
+        async def run_step(step: Dict[str, Any], outputs: Dict[str, str]) -> str:
+            name = step["name"]
+            await WorkflowService._record_step(run_id, name, status=WorkflowStatus.RUNNING, started_at=datetime.utcnow(), error=None)
+            try:
+                if step.get("agent_id"):
+                    agent = agents.get(UUID(step["agent_id"]))
+                    if not agent:
+                        raise ValueError(f"Agent {step['agent_id']} for step {name} not found")
+                else:
+                    agent = template_agent(step["agent_type"], user_id)
+                output, usage = await agent_factory.aexecute_with_usage(agent, render_prompt(step, input_data, outputs))
+            except Exception as e:
+                await WorkflowService._record_step(run_id, name, status=WorkflowStatus.FAILED, error=str(e), completed_at=datetime.utcnow())
+                raise
+            await WorkflowService._record_step(
+                run_id,
+                name,
+                status=WorkflowStatus.COMPLETED,
+                output=output,
+                prompt_tokens=usage.prompt_tokens,
+                completion_tokens=usage.completion_tokens,
+                completed_at=datetime.utcnow()
+            )
+            return output
+        
+        try:
+            if not workflow:
+                raise ValueError("Workflow not found")
+            graph = build_workflow_graph(steps, run_step)
+            # Every level takes two supersteps (node, then its edges) plus two for the input
+            await graph.ainvoke({"outputs": completed}, {"recursion_limit": 2 * len(steps) + 2})
+            
+            async with async_session_scope() as db:
+                await db.execute(update(WorkflowRun).where(WorkflowRun.id == run_id).values(
+                    status=WorkflowStatus.COMPLETED,
+                    completed_at=datetime.utcnow()
+                ))
+            JOB_DURATION.labels("workflow", "completed").observe(time.monotonic() - job_start)
+        
+        except Exception as e:
+            async with async_session_scope() as db:
+                await db.execute(update(WorkflowRun).where(WorkflowRun.id == run_id).values(
+                    status=WorkflowStatus.FAILED,
+                    error=str(e),
+                    completed_at=datetime.utcnow()
+                ))
+            JOB_DURATION.labels("workflow", "failed").observe(time.monotonic() - job_start)
+    
+    @staticmethod
+    async def _record_step(run_id: UUID, step_name: str, **values):
+        # Upsert so a resumed run overwrites the row its crashed attempt left
+        statement = pg_insert(WorkflowStepRun).values(run_id=run_id, step_name=step_name, **values)
+        statement = statement.on_conflict_do_update(
+            constraint="uq_workflow_step_runs_run_id_step_name",
+            set_=values
+        )
+        async with async_session_scope() as db:
+            await db.execute(statement)
+
+workflow_service = WorkflowService()
@@ -1,18 +1,40 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from prometheus_client import CONTENT_TYPE_LATEST
 import uvicorn
+import os
 
-from app.api import tasks, agents, executions
-from app.core.database import Base, init_db
+from app.api import tasks, agents, executions, usage, conversations, workflows
+from app.core.database import dispose_async_db
 from app.core.redis_client import redis_client
+from app.core.auth import jwks_cache, token_cache
+from app.core.config import settings
+from app.core.job_queue import job_queue
+from app.core.health import check_readiness
+from app.core.schema import check_schema
+from app.core.metrics import MetricsMiddleware, JOB_QUEUE_DEPTH, render_metrics
+from app.agents.factory import agent_factory
+from app.agents.response_cache import response_cache
+from app.agents.runtime_cache import agent_runtime_cache
+from app.agents.scheduler import llm_scheduler
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    engine = init_db()
-    Base.metadata.create_all(bind=engine)
+    # Schema changes are applied by migrate.py, not on every replica's boot
+    if settings.SCHEMA_CHECK_ON_STARTUP:
+        await check_schema()
     await redis_client.connect()
+    if os.getenv("ENVIRONMENT") != "development":
+        jwks_cache.warm()
+    if settings.JOB_QUEUE_ENABLED:
+        await job_queue.ensure_group()
+    agent_runtime_cache.start()
     yield
+    await agent_runtime_cache.stop()
+    await agent_factory.aclose()
+    await dispose_async_db()
     await redis_client.disconnect()
 
 app = FastAPI(
@@ -31,10 +53,14 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(tasks.router, prefix="/api/tasks", tags=["Tasks"])
 app.include_router(agents.router, prefix="/api/agents", tags=["Agents"])
 app.include_router(executions.router, prefix="/api/executions", tags=["Executions"])
+app.include_router(conversations.router, prefix="/api/conversations", tags=["Conversations"])
+app.include_router(workflows.router, prefix="/api/workflows", tags=["Workflows"])
+app.include_router(usage.router, prefix="/api/usage", tags=["Usage"])
 
 @app.get("/")
 async def root():
@@ -48,9 +74,30 @@ async def root():
 async def health_check():
     try:
         await redis_client.ping()
-        return {"status": "healthy", "redis": "connected", "database": "connected"}
+        return {"status": "healthy", "redis": "connected", "token_cache": token_cache.stats(), "response_cache": await response_cache.stats(), "agent_runtime_cache": agent_runtime_cache.stats(), "llm_scheduler": llm_scheduler.stats()}
     except Exception as e:
-        return {"status": "unhealthy", "error": str(e)}
+        return JSONResponse({"status": "unhealthy", "error": str(e)}, status_code=503)
+
+@app.get("/livez", include_in_schema=False)
+async def liveness():
+    # The event loop is serving requests; dependencies are /readyz's concern
+    return {"status": "alive"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readiness():
+    report = await check_readiness()
+    return JSONResponse(report, status_code=200 if report["status"] == "ready" else 503)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if settings.JOB_QUEUE_ENABLED:
+        try:
+            JOB_QUEUE_DEPTH.labels("stream").set(await job_queue.depth())
+            JOB_QUEUE_DEPTH.labels("pending").set(await job_queue.pending())
+        except Exception:
+            pass
+    # Set as a header; as media_type Starlette would append a second charset
+    return Response(render_metrics(), headers={"Content-Type": CONTENT_TYPE_LATEST})
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
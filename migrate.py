@@ -0,0 +1,91 @@
+"""Apply database migrations.
+
+    python migrate.py                    # upgrade to the latest revision
+    python migrate.py upgrade 0003       # upgrade to a specific revision
+    python migrate.py downgrade 0003     # downgrade to a specific revision
+    python migrate.py upgrade --sql      # print the upgrade SQL instead of running it
+    python migrate.py current            # show the database's revision
+
+Run this once per deploy as a release step, before the new API and workers
+start (e.g. a pre-deploy job or init container running this image with
+`python migrate.py`); neither runs DDL on startup, and both refuse to start
+against an older schema. Concurrent runs are serialized with a Postgres
+advisory lock, so an overlapping retry of the release step is safe.
+"""
+from contextlib import contextmanager
+import argparse
+import os
+import sys
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, text
+
+from app.core.database import init_db
+
+# The schema the API created with create_all before migrations existed
+BASELINE_REVISION = "0001"
+# Arbitrary key for pg_advisory_lock; the same for every copy of migrate.py
+MIGRATION_LOCK_KEY = 720_450_311
+
+def get_alembic_config() -> Config:
+    return Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+
+def adopt_unversioned_database(config: Config):
+    """Stamp databases created by the old create_all-at-startup code.
+    
+    Later revisions check for objects create_all may already have made.
+    """
+    engine = init_db()
+    try:
+        with engine.connect() as conn:
+            inspector = inspect(conn)
+            if inspector.has_table("agents") and not inspector.has_table("alembic_version"):
+                command.stamp(config, BASELINE_REVISION)
+    finally:
+        engine.dispose()
+
+@contextmanager
+def migration_lock():
+    """Hold a session-level advisory lock while migrations run."""
+    engine = init_db()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    finally:
+        engine.dispose()
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Apply database migrations")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=["upgrade", "downgrade", "current", "history"])
+    parser.add_argument("revision", nargs="?")
+    parser.add_argument("--sql", action="store_true", help="print the SQL instead of running it")
+    args = parser.parse_args(argv)
+    config = get_alembic_config()
+    
+    if args.command == "upgrade":
+        if args.sql:
+            command.upgrade(config, args.revision or "head", sql=True)
+        else:
+            with migration_lock():
+                adopt_unversioned_database(config)
+                command.upgrade(config, args.revision or "head")
+    elif args.command == "downgrade":
+        if not args.revision:
+            parser.error("downgrade needs a target revision")
+        if args.sql:
+            command.downgrade(config, args.revision, sql=True)
+        else:
+            with migration_lock():
+                command.downgrade(config, args.revision)
+    elif args.command == "current":
+        command.current(config)
+    else:
+        command.history(config)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,32 @@
+"""Introspection helpers for revisions that may find their objects already present.
+
+Databases created by the old create_all-at-startup code can already have some
+tables and indexes from later revisions. In offline (--sql) mode there is no
+connection to inspect, so everything is assumed missing.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+def _inspector():
+    if op.get_context().as_sql:
+        return None
+    return sa.inspect(op.get_bind())
+
+def has_table(table: str) -> bool:
+    inspector = _inspector()
+    return inspector is not None and inspector.has_table(table)
+
+def has_column(table: str, column: str) -> bool:
+    inspector = _inspector()
+    return inspector is not None and any(c["name"] == column for c in inspector.get_columns(table))
+
+def has_index(table: str, index: str) -> bool:
+    inspector = _inspector()
+    return inspector is not None and any(i["name"] == index for i in inspector.get_indexes(table))
+
+def create_index_concurrently(name: str, table: str, columns, **kw):
+    """Build an index without blocking writes to a live table."""
+    if has_index(table, name):
+        return
+    with op.get_context().autocommit_block():
+        op.create_index(name, table, columns, postgresql_concurrently=True, **kw)
@@ -0,0 +1,80 @@
+"""initial schema
+
+The tables as the API originally created them with create_all.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+agent_type = sa.Enum("RESEARCHER", "CODER", "ANALYST", "WRITER", "MARKETER", "DEBUGGER", "REVIEWER", "CUSTOM", name="agenttype")
+task_status = sa.Enum("PENDING", "PROCESSING", "COMPLETED", "FAILED", name="taskstatus")
+execution_status = sa.Enum("PENDING", "RUNNING", "COMPLETED", "FAILED", name="executionstatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "agents",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", sa.String(255), nullable=False),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("agent_type", agent_type, nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("system_prompt", sa.Text(), nullable=False),
+        sa.Column("capabilities", sa.JSON()),
+        sa.Column("model", sa.String(100)),
+        sa.Column("temperature", sa.String(10)),
+        sa.Column("max_tokens", sa.String(10)),
+        sa.Column("agent_metadata", sa.JSON()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime())
+    )
+    op.create_index("ix_agents_user_id", "agents", ["user_id"])
+    
+    op.create_table(
+        "tasks",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("status", task_status),
+        sa.Column("created_agent_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("agents.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("result", sa.JSON()),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("task_metadata", sa.JSON()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime())
+    )
+    op.create_index("ix_tasks_user_id", "tasks", ["user_id"])
+    
+    op.create_table(
+        "executions",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", sa.String(255), nullable=False),
+        sa.Column("agent_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("agents.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("input_data", sa.Text(), nullable=False),
+        sa.Column("status", execution_status),
+        sa.Column("output", sa.Text(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("execution_time", sa.String(50), nullable=True),
+        sa.Column("execution_metadata", sa.JSON()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("completed_at", sa.DateTime(), nullable=True)
+    )
+    op.create_index("ix_executions_user_id", "executions", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("executions")
+    op.drop_table("tasks")
+    op.drop_table("agents")
+    execution_status.drop(op.get_bind(), checkfirst=True)
+    task_status.drop(op.get_bind(), checkfirst=True)
+    agent_type.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,32 @@
+"""keyset list indexes
+
+Composite (user_id, created_at DESC, id DESC) indexes behind cursor
+pagination of the list endpoints.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import create_index_concurrently
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    create_index_concurrently("ix_agents_user_id_created_at", "agents", ["user_id", sa.text("created_at DESC"), sa.text("id DESC")])
+    create_index_concurrently("ix_tasks_user_id_created_at", "tasks", ["user_id", sa.text("created_at DESC"), sa.text("id DESC")])
+    create_index_concurrently("ix_executions_user_id_created_at", "executions", ["user_id", sa.text("created_at DESC"), sa.text("id DESC")])
+    create_index_concurrently("ix_executions_user_id_agent_id_created_at", "executions", ["user_id", "agent_id", sa.text("created_at DESC"), sa.text("id DESC")])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_executions_user_id_agent_id_created_at", table_name="executions")
+    op.drop_index("ix_executions_user_id_created_at", table_name="executions")
+    op.drop_index("ix_tasks_user_id_created_at", table_name="tasks")
+    op.drop_index("ix_agents_user_id_created_at", table_name="agents")
@@ -0,0 +1,42 @@
+"""execution batches
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migrations.helpers import has_table, has_column, create_index_concurrently
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not has_table("execution_batches"):
+        op.create_table(
+            "execution_batches",
+            sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column("user_id", sa.String(255), nullable=False),
+            sa.Column("agent_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("agents.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("total", sa.Integer(), nullable=False),
+            sa.Column("batch_metadata", sa.JSON()),
+            sa.Column("created_at", sa.DateTime())
+        )
+        op.create_index("ix_execution_batches_user_id", "execution_batches", ["user_id"])
+    
+    if not has_column("executions", "batch_id"):
+        op.add_column("executions", sa.Column("batch_id", postgresql.UUID(as_uuid=True), nullable=True))
+        op.create_foreign_key("executions_batch_id_fkey", "executions", "execution_batches", ["batch_id"], ["id"], ondelete="SET NULL")
+    create_index_concurrently("ix_executions_batch_id", "executions", ["batch_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_executions_batch_id", table_name="executions")
+    op.drop_constraint("executions_batch_id_fkey", "executions", type_="foreignkey")
+    op.drop_column("executions", "batch_id")
+    op.drop_table("execution_batches")
@@ -0,0 +1,43 @@
+"""usage columns
+
+Token counts, latency and cost on executions and tasks.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_column
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+TABLES = ("executions", "tasks")
+
+
+def usage_columns():
+    return [
+        sa.Column("prompt_tokens", sa.Integer(), nullable=True),
+        sa.Column("completion_tokens", sa.Integer(), nullable=True),
+        sa.Column("latency_ms", sa.Integer(), nullable=True),
+        sa.Column("ttft_ms", sa.Integer(), nullable=True),
+        sa.Column("cost_usd", sa.Numeric(12, 6), nullable=True)
+    ]
+
+
+def upgrade() -> None:
+    # Nullable without defaults, so Postgres adds them without rewriting the table
+    for table in TABLES:
+        for column in usage_columns():
+            if not has_column(table, column.name):
+                op.add_column(table, column)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        for column in usage_columns():
+            op.drop_column(table, column.name)
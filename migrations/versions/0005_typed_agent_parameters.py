@@ -0,0 +1,36 @@
+"""typed agent parameters
+
+agents.temperature and agents.max_tokens were String(10) and parsed on every
+execution.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        "agents", "temperature",
+        existing_type=sa.String(10),
+        type_=sa.Float(),
+        postgresql_using="NULLIF(trim(temperature), '')::double precision"
+    )
+    op.alter_column(
+        "agents", "max_tokens",
+        existing_type=sa.String(10),
+        type_=sa.Integer(),
+        postgresql_using="NULLIF(trim(max_tokens), '')::numeric::integer"
+    )
+
+
+def downgrade() -> None:
+    op.alter_column("agents", "max_tokens", existing_type=sa.Integer(), type_=sa.String(10), postgresql_using="max_tokens::text")
+    op.alter_column("agents", "temperature", existing_type=sa.Float(), type_=sa.String(10), postgresql_using="temperature::text")
@@ -0,0 +1,50 @@
+"""conversations
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "conversations",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", sa.String(255), nullable=False),
+        sa.Column("agent_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("agents.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("title", sa.String(255), nullable=True),
+        sa.Column("summary", sa.Text(), nullable=True),
+        sa.Column("summarized_through", sa.Integer(), nullable=False),
+        sa.Column("message_count", sa.Integer(), nullable=False),
+        sa.Column("conversation_metadata", sa.JSON()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime())
+    )
+    op.create_index("ix_conversations_user_id", "conversations", ["user_id"])
+    op.create_index("ix_conversations_agent_id", "conversations", ["agent_id"])
+    op.create_index("ix_conversations_user_id_created_at", "conversations", ["user_id", sa.text("created_at DESC"), sa.text("id DESC")])
+    
+    op.create_table(
+        "conversation_messages",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("conversation_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("role", sa.String(20), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("token_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.UniqueConstraint("conversation_id", "seq", name="uq_conversation_messages_conversation_id_seq")
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("conversation_messages")
+    op.drop_table("conversations")
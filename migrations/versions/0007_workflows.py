@@ -0,0 +1,67 @@
+"""workflows
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+workflow_status = sa.Enum("PENDING", "RUNNING", "COMPLETED", "FAILED", name="workflowstatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "workflows",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", sa.String(255), nullable=False),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("definition", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime())
+    )
+    op.create_index("ix_workflows_user_id", "workflows", ["user_id"])
+    op.create_index("ix_workflows_user_id_created_at", "workflows", ["user_id", sa.text("created_at DESC"), sa.text("id DESC")])
+    
+    op.create_table(
+        "workflow_runs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("workflow_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("workflows.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_id", sa.String(255), nullable=False),
+        sa.Column("status", workflow_status),
+        sa.Column("input_data", sa.Text(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("completed_at", sa.DateTime(), nullable=True)
+    )
+    op.create_index("ix_workflow_runs_user_id", "workflow_runs", ["user_id"])
+    op.create_index("ix_workflow_runs_workflow_id_created_at", "workflow_runs", ["workflow_id", sa.text("created_at DESC"), sa.text("id DESC")])
+    
+    op.create_table(
+        "workflow_step_runs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("run_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("workflow_runs.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("step_name", sa.String(100), nullable=False),
+        sa.Column("status", workflow_status),
+        sa.Column("output", sa.Text(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=True),
+        sa.Column("completion_tokens", sa.Integer(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("run_id", "step_name", name="uq_workflow_step_runs_run_id_step_name")
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("workflow_step_runs")
+    op.drop_table("workflow_runs")
+    op.drop_table("workflows")
+    workflow_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,39 @@
+from collections import Counter
+
+import fakeredis
+
+from app.core.redis_client import RedisClient
+
+class DeliveryCountingRedis(fakeredis.aioredis.FakeRedis):
+    """FakeRedis that also reports XPENDING's times_delivered.
+    
+    fakeredis leaves the count out; like Redis, this one counts a delivery
+    on every XREADGROUP and XAUTOCLAIM that hands a message out.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.deliveries: Counter = Counter()
+    
+    async def xreadgroup(self, *args, **kwargs):
+        response = await super().xreadgroup(*args, **kwargs)
+        for _, messages in response or []:
+            for message_id, _ in messages:
+                self.deliveries[message_id] += 1
+        return response
+    
+    async def xautoclaim(self, *args, **kwargs):
+        response = await super().xautoclaim(*args, **kwargs)
+        for message_id, _ in response[1]:
+            self.deliveries[message_id] += 1
+        return response
+    
+    async def xpending_range(self, *args, **kwargs):
+        entries = await super().xpending_range(*args, **kwargs)
+        return [{**entry, "times_delivered": self.deliveries[entry["message_id"]]} for entry in entries]
+
+def fake_client(redis_class=DeliveryCountingRedis) -> RedisClient:
+    """RedisClient on a fresh in-memory server, so tests don't share state."""
+    client = RedisClient()
+    client.redis = redis_class(server=fakeredis.FakeServer(), decode_responses=True)
+    return client
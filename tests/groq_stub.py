@@ -0,0 +1,89 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+import json
+import threading
+
+class GroqStub:
+    """Local Groq-compatible chat completions endpoint on a free port.
+    
+    Answers every request with ``reply`` split into word tokens, as one
+    completion or as an SSE stream whose last chunk carries x_groq usage the
+    way Groq sends it. Request bodies are kept in ``requests``.
+    """
+    
+    def __init__(self, reply: str = "Hello from the stub", prompt_tokens: int = 12):
+        self.reply = reply
+        self.prompt_tokens = prompt_tokens
+        self.requests: List[dict] = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+    
+    @property
+    def tokens(self) -> List[str]:
+        words = self.reply.split(" ")
+        return [word if i == 0 else f" {word}" for i, word in enumerate(words)]
+    
+    def usage(self) -> dict:
+        completion_tokens = len(self.tokens)
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": self.prompt_tokens + completion_tokens
+        }
+    
+    def completion(self, model: str) -> dict:
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": 0,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": self.reply}, "finish_reason": "stop"}],
+            "usage": self.usage()
+        }
+    
+    def chunks(self, model: str) -> List[dict]:
+        base = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": 0, "model": model}
+        chunks = [{**base, "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]} for token in self.tokens]
+        chunks.append({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "x_groq": {"id": "req-stub", "usage": self.usage()}})
+        return chunks
+    
+    def _handler(self):
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests.append({"path": self.path, **body})
+                if not self.path.endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                if body.get("stream"):
+                    payload = "".join(f"data: {json.dumps(chunk)}\n\n" for chunk in stub.chunks(body["model"])) + "data: [DONE]\n\n"
+                    content_type = "text/event-stream"
+                else:
+                    payload = json.dumps(stub.completion(body["model"]))
+                    content_type = "application/json"
+                data = payload.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+    
+    def __enter__(self) -> "GroqStub":
+        self.thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,37 @@
+from cryptography.hazmat.primitives.asymmetric import rsa
+from typing import Dict, List
+import json
+import jwt
+
+class JWKSStub:
+    """Local stand-in for Clerk's JWKS endpoint, usable as a JWKSCache fetcher.
+    
+    Holds RSA keys by kid, signs tokens with them, and can be rotated or
+    taken down to simulate an outage. Unpublished keys sign tokens whose kid
+    the endpoint never serves.
+    """
+    
+    def __init__(self, kid: str = "key-1"):
+        self.private_keys: Dict[str, rsa.RSAPrivateKey] = {}
+        self.published: List[str] = []
+        self.available = True
+        self.calls = 0
+        self.rotate(kid)
+    
+    def rotate(self, kid: str, publish: bool = True):
+        self.private_keys[kid] = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        if publish:
+            self.published.append(kid)
+    
+    def sign(self, kid: str, claims: dict) -> str:
+        return jwt.encode(claims, self.private_keys[kid], algorithm="RS256", headers={"kid": kid})
+    
+    def __call__(self) -> dict:
+        self.calls += 1
+        if not self.available:
+            raise ConnectionError("JWKS endpoint unavailable")
+        keys = []
+        for kid in self.published:
+            jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(self.private_keys[kid].public_key()))
+            keys.append({**jwk, "kid": kid, "use": "sig", "alg": "RS256"})
+        return {"keys": keys}
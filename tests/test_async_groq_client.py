@@ -0,0 +1,59 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.agents.factory import AgentFactory, CompletionUsage
+from app.core.config import settings
+from tests.groq_stub import GroqStub
+
+MODEL = "llama-3.1-8b-instant"
+
+@pytest.fixture
+def stub(monkeypatch):
+    with GroqStub() as stub:
+        monkeypatch.setattr(settings, "GROQ_BASE_URL", stub.base_url)
+        yield stub
+
+def agent() -> SimpleNamespace:
+    return SimpleNamespace(
+        user_id="user_1",
+        model=MODEL,
+        temperature=0.0,
+        max_tokens=64,
+        system_prompt="You are terse.",
+        agent_metadata={}
+    )
+
+async def complete(factory: AgentFactory, usage: CompletionUsage):
+    try:
+        return await factory._acomplete(MODEL, [{"role": "user", "content": "hi"}], "user_1", usage, temperature=0, max_tokens=64)
+    finally:
+        await factory.aclose()
+
+async def stream(factory: AgentFactory):
+    try:
+        usage, tokens = await factory.aopen_stream(agent(), "hi")
+        return usage, [token async for token in tokens]
+    finally:
+        await factory.aclose()
+
+def test_completion_goes_through_the_pooled_client(stub):
+    usage = CompletionUsage()
+    response = asyncio.run(complete(AgentFactory(), usage))
+    
+    assert response.choices[0].message.content == stub.reply
+    assert stub.requests[0]["path"].endswith("/chat/completions")
+    assert stub.requests[0]["model"] == MODEL
+    assert (usage.prompt_tokens, usage.completion_tokens) == (12, len(stub.tokens))
+
+def test_streaming_relays_tokens_and_reads_usage_from_the_last_chunk(stub):
+    usage, tokens = asyncio.run(stream(AgentFactory()))
+    
+    assert tokens == stub.tokens
+    assert "".join(tokens) == stub.reply
+    assert stub.requests[0]["stream"] is True
+    assert stub.requests[0]["messages"][0] == {"role": "system", "content": "You are terse."}
+    assert usage.model == MODEL
+    assert (usage.prompt_tokens, usage.completion_tokens) == (12, len(stub.tokens))
+    assert usage.ttft_ms is not None
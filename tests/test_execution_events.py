@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import executions
+from app.core.event_stream import ExecutionEventStream
+from tests.fake_redis import fake_client
+
+async def replay(events: ExecutionEventStream, execution_id, last_event_id=None):
+    seen = []
+    async for item in events.listen(execution_id, last_event_id, block_ms=10):
+        if item is None:
+            break
+        seen.append(item)
+    return seen
+
+def test_a_takeover_replaces_the_failed_attempts_events():
+    async def scenario():
+        events = ExecutionEventStream(fake_client())
+        execution_id = uuid4()
+        await events.publish(execution_id, "status", status="running")
+        await events.publish(execution_id, "token", content="half an ans")
+        relayed = await replay(events, execution_id)
+        
+        await events.reset(execution_id)
+        await events.publish(execution_id, "status", status="running")
+        await events.publish(execution_id, "token", content="a whole answer")
+        await events.publish(execution_id, "done", status="completed")
+        
+        fresh = [event for _, event in await replay(events, execution_id)]
+        resumed = [event["type"] for _, event in await replay(events, execution_id, relayed[-1][0])]
+        return fresh, resumed
+    
+    fresh, resumed = asyncio.run(scenario())
+    
+    assert [event["type"] for event in fresh] == ["reset", "status", "token", "done"]
+    assert fresh[2]["content"] == "a whole answer"
+    # A subscriber that already relayed part of the failed attempt is told to drop it
+    assert resumed == ["reset", "status", "token", "done"]
+
+@pytest.fixture
+def idle_execution(monkeypatch):
+    listening = threading.Event()
+    stopped = threading.Event()
+    
+    async def authenticate(token):
+        return "user_1"
+    
+    async def snapshot(execution_id, user_id):
+        return {"status": "running"}
+    
+    async def idle_events(execution_id, snapshot, last_event_id=None):
+        listening.set()
+        try:
+            while True:
+                await asyncio.sleep(0.01)
+                yield None
+        finally:
+            stopped.set()
+    
+    monkeypatch.setattr(executions, "authenticate_token", authenticate)
+    monkeypatch.setattr(executions, "_get_execution_snapshot", snapshot)
+    monkeypatch.setattr(executions, "_execution_events", idle_events)
+    app = FastAPI()
+    app.include_router(executions.router, prefix="/api/executions")
+    return TestClient(app), listening, stopped
+
+def test_the_websocket_relay_stops_when_an_idle_client_leaves(idle_execution):
+    client, listening, stopped = idle_execution
+    
+    with client.websocket_connect(f"/api/executions/{uuid4()}/ws?token=t"):
+        assert listening.wait(5)
+        time.sleep(0.05)
+        assert not stopped.is_set()
+    
+    assert stopped.wait(5)
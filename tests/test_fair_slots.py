@@ -0,0 +1,68 @@
+import asyncio
+
+from app.agents.scheduler import FairSlots
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_free_slots_go_round_robin_across_users():
+    async def scenario():
+        slots = FairSlots(1)
+        await slots.acquire("flooder")
+        granted = []
+        
+        async def call(user_id: str, name: str):
+            await slots.acquire(user_id)
+            granted.append(name)
+        
+        tasks = [asyncio.create_task(call("flooder", f"f{i}")) for i in range(3)]
+        await settle()
+        tasks.append(asyncio.create_task(call("quiet", "q0")))
+        await settle()
+        assert slots.waiting == 4
+        
+        for _ in range(4):
+            slots.release()
+            await settle()
+        await asyncio.gather(*tasks)
+        
+        assert granted == ["f0", "q0", "f1", "f2"]
+        assert slots.active == 1
+    
+    asyncio.run(scenario())
+
+def test_a_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        slots = FairSlots(1)
+        await slots.acquire("a")
+        waiter = asyncio.create_task(slots.acquire("b"))
+        await settle()
+        
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert slots.waiting == 0
+        
+        slots.release()
+        assert slots.active == 0
+    
+    asyncio.run(scenario())
+
+def test_a_waiter_cancelled_after_its_grant_hands_the_slot_on():
+    async def scenario():
+        slots = FairSlots(1)
+        await slots.acquire("a")
+        granted = asyncio.create_task(slots.acquire("b"))
+        behind = asyncio.create_task(slots.acquire("c"))
+        await settle()
+        
+        # The slot is handed to b, but b is cancelled before it resumes
+        slots.release()
+        granted.cancel()
+        await asyncio.gather(granted, return_exceptions=True)
+        await settle()
+        
+        assert behind.done() and not behind.cancelled()
+        assert slots.active == 1
+    
+    asyncio.run(scenario())
@@ -0,0 +1,79 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from groq import BadRequestError
+
+from app.agents.factory import AgentFactory
+
+CONFIG = {
+    "agent_type": "RESEARCHER",
+    "reasoning": "needs facts",
+    "suggested_name": "Researcher",
+    "description": "looks things up",
+    "custom_prompt_additions": ""
+}
+
+def completion(content: str):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+def bad_request(code: str) -> BadRequestError:
+    body = {"error": {"message": "failed", "type": "invalid_request_error", "code": code}}
+    response = httpx.Response(400, json=body, request=httpx.Request("POST", "http://groq.test/chat/completions"))
+    return BadRequestError(f"Error code: 400 - {body}", response=response, body=body)
+
+def make_factory(monkeypatch, *replies) -> tuple:
+    """Factory whose completions return (or raise) replies in order."""
+    factory = AgentFactory()
+    calls = []
+    
+    async def acomplete(model, messages, user_id, usage=None, **params):
+        calls.append(params)
+        reply = replies[len(calls) - 1]
+        if isinstance(reply, Exception):
+            raise reply
+        return completion(reply)
+    
+    async def no_lookup(task_description):
+        return None
+    
+    monkeypatch.setattr(factory, "_acomplete", acomplete)
+    monkeypatch.setattr(factory, "alookup_agent_config", no_lookup)
+    return factory, calls
+
+def test_fused_answer_is_returned_with_its_config(monkeypatch):
+    factory, calls = make_factory(monkeypatch, json.dumps({**CONFIG, "output": "the answer"}))
+    
+    config, output = asyncio.run(factory.aresolve_fused("find facts"))
+    
+    assert config == CONFIG
+    assert output == "the answer"
+    assert len(calls) == 1
+
+def test_truncated_fused_reply_falls_back_to_a_config_call(monkeypatch):
+    truncated = json.dumps({**CONFIG, "output": "a long answer"})[:-20]
+    factory, calls = make_factory(monkeypatch, truncated, json.dumps(CONFIG))
+    
+    config, output = asyncio.run(factory.aresolve_fused("find facts"))
+    
+    assert config == CONFIG
+    assert output is None
+    assert "response_format" not in calls[1]
+
+def test_json_validation_400_falls_back_to_a_config_call(monkeypatch):
+    factory, calls = make_factory(monkeypatch, bad_request("json_validate_failed"), json.dumps(CONFIG))
+    
+    config, output = asyncio.run(factory.aresolve_fused("find facts"))
+    
+    assert config == CONFIG
+    assert output is None
+    assert len(calls) == 2
+
+def test_other_400s_are_not_swallowed(monkeypatch):
+    factory, calls = make_factory(monkeypatch, bad_request("model_not_found"))
+    
+    with pytest.raises(BadRequestError):
+        asyncio.run(factory.aresolve_fused("find facts"))
+    assert len(calls) == 1
@@ -0,0 +1,87 @@
+import asyncio
+
+import fakeredis
+
+from app.core.job_queue import JobQueue, JOB_EXECUTION
+from tests.fake_redis import DeliveryCountingRedis, fake_client
+
+def make_queue(redis_class=DeliveryCountingRedis, visibility_timeout: int = 0, max_retries: int = 3) -> JobQueue:
+    return JobQueue(fake_client(redis_class), stream="jobs", group="workers", visibility_timeout=visibility_timeout, max_retries=max_retries)
+
+def test_fresh_jobs_are_delivered_once_and_acked():
+    async def scenario():
+        queue = make_queue(visibility_timeout=300)
+        await queue.ensure_group()
+        await queue.enqueue(JOB_EXECUTION, {"execution_id": "e1"})
+        
+        [job] = await queue.reserve("worker-a", block_ms=10)
+        assert (job.job_type, job.payload, job.attempts) == (JOB_EXECUTION, {"execution_id": "e1"}, 1)
+        assert await queue.reserve("worker-b", block_ms=10) == []
+        
+        await queue.ack(job.message_id)
+        assert await queue.pending() == 0
+    
+    asyncio.run(scenario())
+
+def test_an_idle_job_is_taken_over_with_its_attempt_count():
+    async def scenario():
+        queue = make_queue()
+        await queue.ensure_group()
+        await queue.enqueue(JOB_EXECUTION, {"execution_id": "e1"})
+        
+        [first] = await queue.reserve("worker-a", block_ms=10)
+        [second] = await queue.reserve("worker-b", block_ms=10)
+        
+        assert second.message_id == first.message_id
+        assert second.attempts == 2
+    
+    asyncio.run(scenario())
+
+def test_a_touched_job_is_not_taken_over():
+    async def scenario():
+        queue = make_queue()
+        queue.visibility_timeout_ms = 200
+        await queue.ensure_group()
+        await queue.enqueue(JOB_EXECUTION, {"execution_id": "e1"})
+        
+        [job] = await queue.reserve("worker-a", block_ms=10)
+        for _ in range(3):
+            await asyncio.sleep(0.1)
+            await queue.touch(job.message_id, "worker-a")
+            assert await queue.reserve("worker-b", block_ms=10) == []
+        
+        await asyncio.sleep(0.3)
+        [taken] = await queue.reserve("worker-b", block_ms=10)
+        assert taken.message_id == job.message_id
+    
+    asyncio.run(scenario())
+
+def test_a_job_is_dead_lettered_after_max_deliveries():
+    async def scenario():
+        queue = make_queue(max_retries=2)
+        await queue.ensure_group()
+        await queue.enqueue(JOB_EXECUTION, {"execution_id": "e1"})
+        
+        assert [job.attempts for job in await queue.reserve("worker-a", block_ms=10)] == [1]
+        assert [job.attempts for job in await queue.reserve("worker-b", block_ms=10)] == [2]
+        assert await queue.reserve("worker-c", block_ms=10) == []
+        
+        assert await queue.pending() == 0
+        [(_, fields)] = await queue.redis.xrange(queue.dead_letter_stream)
+        assert fields["error"] == "max retries exceeded"
+        assert fields["type"] == JOB_EXECUTION
+    
+    asyncio.run(scenario())
+
+def test_an_unknown_delivery_count_counts_as_exhausted():
+    async def scenario():
+        # Plain fakeredis reports no times_delivered
+        queue = make_queue(fakeredis.aioredis.FakeRedis)
+        await queue.ensure_group()
+        await queue.enqueue(JOB_EXECUTION, {"execution_id": "e1"})
+        
+        await queue.reserve("worker-a", block_ms=10)
+        assert await queue.reserve("worker-b", block_ms=10) == []
+        assert await queue.redis.xlen(queue.dead_letter_stream) == 1
+    
+    asyncio.run(scenario())
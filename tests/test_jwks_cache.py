@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+import jwt
+import pytest
+
+from app.core.auth import JWKSCache
+from tests.jwks_stub import JWKSStub
+
+def wait_for_refresh(cache: JWKSCache, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while cache._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def verify(cache: JWKSCache, token: str) -> dict:
+    key = asyncio.run(cache.get_signing_key_from_jwt(token))
+    return jwt.decode(token, key.key, algorithms=["RS256"])
+
+def test_keys_are_fetched_once_and_reused():
+    stub = JWKSStub()
+    cache = JWKSCache(fetcher=stub, ttl=3600)
+    token = stub.sign("key-1", {"sub": "user_1"})
+    
+    assert verify(cache, token)["sub"] == "user_1"
+    assert verify(cache, token)["sub"] == "user_1"
+    assert stub.calls == 1
+
+def test_rotated_kid_is_accepted_after_one_refetch():
+    stub = JWKSStub()
+    cache = JWKSCache(fetcher=stub, ttl=3600)
+    verify(cache, stub.sign("key-1", {"sub": "user_1"}))
+    
+    stub.rotate("key-2")
+    token = stub.sign("key-2", {"sub": "user_2"})
+    
+    assert verify(cache, token)["sub"] == "user_2"
+    assert verify(cache, token)["sub"] == "user_2"
+    assert stub.calls == 2
+
+def test_unknown_kids_refetch_at_most_once_per_cooldown():
+    stub = JWKSStub()
+    cache = JWKSCache(fetcher=stub, ttl=3600, refresh_cooldown=60)
+    verify(cache, stub.sign("key-1", {"sub": "user_1"}))
+    
+    for kid in ("random-1", "random-2", "random-3"):
+        stub.rotate(kid, publish=False)
+        with pytest.raises(jwt.InvalidTokenError):
+            verify(cache, stub.sign(kid, {"sub": "attacker"}))
+    
+    # The initial fill plus one refetch; later unknown kids fell in its cooldown
+    assert stub.calls == 2
+
+def test_stale_keys_are_served_through_an_outage():
+    stub = JWKSStub()
+    cache = JWKSCache(fetcher=stub, ttl=60, refresh_cooldown=0)
+    token = stub.sign("key-1", {"sub": "user_1"})
+    verify(cache, token)
+    
+    stub.available = False
+    cache._fetched_at -= 120
+    for _ in range(3):
+        assert verify(cache, token)["sub"] == "user_1"
+        wait_for_refresh(cache)
+    assert stub.calls > 1
+    
+    stub.available = True
+    verify(cache, token)
+    wait_for_refresh(cache)
+    assert time.monotonic() - cache._fetched_at < 60
+
+def test_cold_cache_fails_fast_during_an_outage():
+    stub = JWKSStub()
+    stub.available = False
+    cache = JWKSCache(fetcher=stub, refresh_cooldown=60)
+    token = stub.sign("key-1", {"sub": "user_1"})
+    
+    with pytest.raises(ConnectionError):
+        verify(cache, token)
+    with pytest.raises(jwt.InvalidTokenError):
+        verify(cache, token)
+    assert stub.calls == 1
@@ -0,0 +1,33 @@
+import asyncio
+from typing import List
+
+from app.core.ndjson import iter_lines
+
+async def chunked(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+def lines(*chunks: bytes, max_line_bytes: int = 1024) -> List[tuple]:
+    async def collect():
+        return [line async for line in iter_lines(chunked(*chunks), max_line_bytes)]
+    return asyncio.run(collect())
+
+def test_lines_split_across_chunks_are_joined():
+    assert lines(b'{"a"', b': 1}\n{"b": ', b"2}\n") == [(1, '{"a": 1}'), (2, '{"b": 2}')]
+
+def test_blank_lines_are_skipped_but_counted():
+    assert lines(b"one\n\n  \nfour\n") == [(1, "one"), (4, "four")]
+
+def test_a_final_line_without_a_newline_is_kept():
+    assert lines(b"one\ntw", b"o") == [(1, "one"), (2, "two")]
+
+def test_an_oversized_line_is_reported_without_losing_its_neighbours():
+    assert lines(b"short\n" + b"x" * 50 + b"\nafter\n", max_line_bytes=10) == [(1, "short"), (2, None), (3, "after")]
+
+def test_an_oversized_line_spanning_chunks_is_not_buffered():
+    chunks = [b"ok\n"] + [b"y" * 8] * 5 + [b"\nnext\n"]
+    
+    assert lines(*chunks, max_line_bytes=10) == [(1, "ok"), (2, None), (3, "next")]
+
+def test_an_oversized_final_partial_line_is_reported():
+    assert lines(b"ok\n", b"z" * 30, max_line_bytes=10) == [(1, "ok"), (2, None)]
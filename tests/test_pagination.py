@@ -0,0 +1,56 @@
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.core.pagination import decode_cursor, encode_cursor, next_cursor, paginate
+from app.models.agent import Agent
+from app.models.execution import Execution
+from app.schemas.execution import ExecutionSummary
+
+def compile(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+def test_cursors_round_trip():
+    created_at, row_id = datetime(2024, 5, 1, 12, 30, 15, 123456), uuid4()
+    cursor = encode_cursor(created_at, row_id)
+    
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, row_id)
+    assert decode_cursor(None) is None
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(datetime(2024, 1, 1), uuid4())[:-4]])
+def test_malformed_cursors_are_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+def test_next_cursor_points_at_the_last_row_of_a_full_page():
+    rows = [SimpleNamespace(created_at=datetime(2024, 1, day), id=uuid4()) for day in (3, 2)]
+    
+    assert decode_cursor(next_cursor(rows, limit=2)) == (rows[-1].created_at, rows[-1].id)
+    assert next_cursor(rows, limit=3) is None
+    assert next_cursor([], limit=0) is None
+
+def test_a_cursor_page_walks_the_keyset_instead_of_offsetting():
+    query = compile(paginate(select(Agent), Agent, 40, 20, (datetime(2024, 1, 1), uuid4())))
+    
+    assert "(agents.created_at, agents.id) < (" in query
+    assert "OFFSET" not in query
+    assert "ORDER BY agents.created_at DESC, agents.id DESC" in query
+    assert "LIMIT" in query
+
+def test_without_a_cursor_skip_applies():
+    assert "OFFSET" in compile(paginate(select(Agent), Agent, 40, 20, None))
+
+def test_summary_fields_leave_large_columns_unloaded():
+    query = compile(paginate(select(Execution), Execution, 0, 20, None, ExecutionSummary.model_fields))
+    columns = query.split("FROM")[0]
+    
+    assert "executions.status" in columns
+    assert "executions.input_data" not in columns
+    assert "executions.output" not in columns
@@ -0,0 +1,11 @@
+from app.core.schema import is_behind, script_directory
+
+def test_only_an_older_or_missing_revision_is_behind():
+    script = script_directory()
+    head = script.get_current_head()
+    
+    assert is_behind(None, script)
+    assert is_behind("0001", script)
+    assert not is_behind(head, script)
+    # Migrated by a newer release while this one still runs
+    assert not is_behind("9999_from_the_next_release", script)
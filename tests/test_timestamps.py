@@ -0,0 +1,13 @@
+from datetime import datetime, timedelta, timezone
+
+from app.core.timestamps import naive_utc
+
+def test_aware_values_become_naive_utc():
+    paris = timezone(timedelta(hours=2))
+    
+    assert naive_utc(datetime(2024, 1, 1, 2, 0, tzinfo=paris)) == datetime(2024, 1, 1, 0, 0)
+    assert naive_utc(datetime(2024, 1, 1, tzinfo=timezone.utc)) == datetime(2024, 1, 1)
+
+def test_naive_values_and_none_pass_through():
+    assert naive_utc(datetime(2024, 1, 1)) == datetime(2024, 1, 1)
+    assert naive_utc(None) is None
@@ -0,0 +1,55 @@
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+from pydantic import ValidationError
+
+from app.agents.workflow import build_workflow_graph, render_prompt, step_levels
+from app.schemas.workflow import WorkflowCreate
+
+def step(name: str, *depends_on: str, **fields) -> Dict[str, Any]:
+    return {"name": name, "agent_type": "custom", "depends_on": list(depends_on), **fields}
+
+DIAMOND = [step("fetch"), step("summarize", "fetch"), step("critique", "fetch"), step("report", "summarize", "critique")]
+
+def names(levels: List[List[Dict[str, Any]]]) -> List[List[str]]:
+    return [[s["name"] for s in level] for level in levels]
+
+def test_steps_are_grouped_by_dependency_depth():
+    assert names(step_levels(DIAMOND)) == [["fetch"], ["summarize", "critique"], ["report"]]
+    # Listed out of order, a dependency still lands in an earlier level
+    assert names(step_levels(list(reversed(DIAMOND)))) == [["fetch"], ["critique", "summarize"], ["report"]]
+
+def test_cycles_are_rejected():
+    with pytest.raises(ValidationError, match="cycle: a, b"):
+        WorkflowCreate(name="loop", steps=[step("a", "b"), step("b", "a"), step("c")])
+
+def test_unknown_dependencies_are_rejected():
+    with pytest.raises(ValidationError, match="unknown steps: missing"):
+        WorkflowCreate(name="broken", steps=[step("a", "missing")])
+
+def test_dependency_outputs_reach_the_prompt():
+    prompt = render_prompt(step("report", "summarize", "critique", prompt="Combine {summarize} for {input}"), "topic", {"summarize": "S", "critique": "C"})
+    
+    assert prompt == "Combine S for topic\n\n## Output of critique\nC"
+
+def test_the_graph_runs_each_level_after_its_dependencies():
+    async def scenario(initial: Dict[str, str]):
+        ran = []
+        
+        async def run_step(definition: Dict[str, Any], outputs: Dict[str, str]) -> str:
+            assert set(definition["depends_on"]) <= set(outputs)
+            ran.append(definition["name"])
+            return f"{definition['name']} output"
+        
+        graph = build_workflow_graph(DIAMOND, run_step)
+        state = await graph.ainvoke({"outputs": initial}, {"recursion_limit": 2 * len(DIAMOND) + 2})
+        return ran, state["outputs"]
+    
+    ran, outputs = asyncio.run(scenario({}))
+    assert ran[0] == "fetch" and ran[-1] == "report"
+    assert set(outputs) == {"fetch", "summarize", "critique", "report"}
+    
+    # Resuming after a crash skips the steps that already finished
+    ran, _ = asyncio.run(scenario({"fetch": "saved", "summarize": "saved"}))
+    assert ran == ["critique", "report"]
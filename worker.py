@@ -0,0 +1,101 @@
+import asyncio
+import signal
+from uuid import UUID
+from prometheus_client import start_http_server
+
+from app.core.config import settings
+from app.core.database import dispose_async_db
+from app.core.schema import check_schema
+from app.core.redis_client import redis_client
+from app.core.job_queue import job_queue, Job, JOB_EXECUTION, JOB_TASK, JOB_WORKFLOW, default_consumer_name
+from app.agents.factory import agent_factory
+from app.agents.runtime_cache import agent_runtime_cache
+from app.services.execution_service import execution_service
+from app.services.task_service import task_service
+from app.services.workflow_service import workflow_service
+
+async def run_job(job: Job):
+    # A redelivered job's row may still be claimed by the worker that died
+    takeover = job.attempts > 1
+    if job.job_type == JOB_EXECUTION:
+        await execution_service.process_execution(UUID(job.payload["execution_id"]), takeover)
+    elif job.job_type == JOB_TASK:
+        await task_service.process_task(UUID(job.payload["task_id"]), takeover)
+    elif job.job_type == JOB_WORKFLOW:
+        await workflow_service.process_run(UUID(job.payload["run_id"]), takeover)
+    else:
+        raise ValueError(f"Unknown job type: {job.job_type}")
+
+async def keep_alive(job: Job, consumer: str):
+    while True:
+        await asyncio.sleep(settings.JOB_HEARTBEAT_INTERVAL)
+        try:
+            await job_queue.touch(job.message_id, consumer)
+        except Exception as e:
+            print(f"Heartbeat for job {job.message_id} failed: {e}")
+
+async def handle_job(job: Job, consumer: str, semaphore: asyncio.Semaphore):
+    heartbeat = asyncio.create_task(keep_alive(job, consumer))
+    try:
+        await run_job(job)
+    except ValueError as e:
+        await job_queue.dead_letter(job.message_id, job.fields, str(e))
+    except Exception as e:
+        # Left un-acked: another worker reclaims it after the visibility timeout
+        print(f"Job {job.message_id} failed (attempt {job.attempts}): {e}")
+    else:
+        await job_queue.ack(job.message_id)
+    finally:
+        heartbeat.cancel()
+        semaphore.release()
+
+async def run_worker(concurrency: int = settings.WORKER_CONCURRENCY):
+    if settings.SCHEMA_CHECK_ON_STARTUP:
+        await check_schema()
+    await redis_client.connect()
+    await job_queue.ensure_group()
+    agent_runtime_cache.start()
+    if settings.WORKER_METRICS_PORT:
+        try:
+            start_http_server(settings.WORKER_METRICS_PORT)
+        except OSError as e:
+            print(f"Metrics endpoint disabled, port {settings.WORKER_METRICS_PORT} unavailable: {e}")
+    
+    consumer = default_consumer_name()
+    semaphore = asyncio.Semaphore(concurrency)
+    stopping = asyncio.Event()
+    in_flight = set()
+    
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    
+    print(f"Worker {consumer} consuming '{job_queue.stream}' with concurrency {concurrency}")
+    
+    try:
+        while not stopping.is_set():
+            # Only reserve a job once there is a free slot to run it
+            await semaphore.acquire()
+            try:
+                jobs = await job_queue.reserve(consumer, count=1, block_ms=1000)
+            except Exception:
+                semaphore.release()
+                raise
+            if not jobs:
+                semaphore.release()
+                continue
+            
+            job_future = asyncio.create_task(handle_job(jobs[0], consumer, semaphore))
+            in_flight.add(job_future)
+            job_future.add_done_callback(in_flight.discard)
+        
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+    finally:
+        await agent_runtime_cache.stop()
+        await agent_factory.aclose()
+        await dispose_async_db()
+        await redis_client.disconnect()
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())